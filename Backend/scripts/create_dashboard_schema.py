@@ -0,0 +1,13 @@
+"""
+Create the dashboard rollup tables and indexes on an existing database.
+
+Run once per deploy from the Backend directory, before starting the API:
+
+    python -m scripts.create_dashboard_schema
+"""
+
+from src.database import engine
+from src.monitoring.dashboard import create_dashboard_schema
+
+if __name__ == "__main__":
+    create_dashboard_schema(engine)
@@ -1,5 +1,7 @@
 from typing import Dict, Any, List, Optional
+from collections import deque
 from datetime import datetime, timedelta
+from itertools import islice
 import asyncio
 from .actions.alerts import AlertSystem
 from .actions.api_calls import APIActionSystem
@@ -19,7 +21,9 @@ class ActionRegistry:
         self.db_system = DatabaseActionSystem()
         self.workflow_system = WorkflowActionSystem()
         
-        self.action_history = []
+        # Ring buffer of the last 1000 actions; the last 10 are kept as a tuple for decisions
+        self.action_history = deque(maxlen=1000)
+        self.recent_actions = ()
         self.rate_limits = {}
         self.safety_rules = self._load_safety_rules()
         
@@ -236,10 +240,13 @@ class ActionRegistry:
     def _record_action(self, action_record: Dict[str, Any]):
         """Record action in history"""
         self.action_history.append(action_record)
-        
-        # Keep only last 1000 actions
-        if len(self.action_history) > 1000:
-            self.action_history = self.action_history[-1000:]
+        self.recent_actions = self.recent_actions[-9:] + (action_record,)
+    
+    def recent_history(self, limit: int) -> List[Dict[str, Any]]:
+        """Return the last `limit` actions, oldest first, without copying the whole history"""
+        if limit <= 0:
+            return []
+        return list(islice(reversed(self.action_history), limit))[::-1]
     
     def _load_safety_rules(self) -> List[Dict[str, Any]]:
         """Load safety rules from configuration"""
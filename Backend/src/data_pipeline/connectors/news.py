@@ -1,4 +1,6 @@
 import asyncio
+import operator
+import re
 import aiohttp
 import xml.etree.ElementTree as ET
 from typing import Dict, Any, List, Optional
@@ -10,6 +12,22 @@ from .base import BaseConnector
 
 logger = get_logger(__name__)
 
+# Keyword lists for the simple sentiment scorer
+_POSITIVE_WORDS = [
+    'good', 'great', 'excellent', 'positive', 'success', 'win', 
+    'profit', 'growth', 'up', 'rise', 'bullish', 'optimistic'
+]
+
+_NEGATIVE_WORDS = [
+    'bad', 'poor', 'negative', 'failure', 'loss', 'down',
+    'decline', 'fall', 'bearish', 'pessimistic', 'risk', 'warning'
+]
+
+# One alternation over both lists; the named group that matched tells the polarity
+_SENTIMENT_RE = re.compile(
+    r"\b(?:(?P<p>" + "|".join(_POSITIVE_WORDS) + r")|(?P<n>" + "|".join(_NEGATIVE_WORDS) + r"))\b"
+)
+
 class NewsDataConnector(BaseConnector):
     """News data connector for fetching and processing news articles"""
     
@@ -21,7 +39,11 @@ class NewsDataConnector(BaseConnector):
     
     async def initialize(self):
         """Initialize news connector"""
-        self.session = aiohttp.ClientSession()
+        # aiohttp decompresses transparently; advertise it so feeds come gzipped/brotli'd
+        self.session = aiohttp.ClientSession(
+            auto_decompress=True,
+            headers={"Accept-Encoding": "gzip, deflate, br"}
+        )
         logger.info("News connector initialized")
     
     def _load_news_sources(self) -> Dict[str, Dict[str, Any]]:
@@ -88,6 +110,7 @@ class NewsDataConnector(BaseConnector):
                     if article_date and article_date >= from_date:
                         article["source"] = source
                         article["data_type"] = "news_article"
+                        article["_ts"] = article_date
                         filtered_articles.append(article)
                 
                 all_articles.extend(filtered_articles)
@@ -96,10 +119,25 @@ class NewsDataConnector(BaseConnector):
             except Exception as e:
                 logger.error(f"Failed to fetch news from {source}: {e}")
         
-        # Sort by date (newest first)
-        all_articles.sort(key=lambda x: self._parse_article_date(x.get("published")) or datetime.min, reverse=True)
+        # Drop duplicate URLs (same story syndicated across sources)
+        seen_urls = set()
+        unique_articles = []
+        for article in all_articles:
+            url = article.get("url")
+            if url:
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+            unique_articles.append(article)
+        
+        # Sort by date (newest first) using the date parsed during filtering
+        unique_articles.sort(key=operator.itemgetter("_ts"), reverse=True)
+        
+        top_articles = unique_articles[:100]  # Limit to 100 articles
+        for article in top_articles:
+            del article["_ts"]
         
-        return all_articles[:100]  # Limit to 100 articles
+        return top_articles
     
     async def _fetch_api_news(self, source: str, query: Optional[str], from_date: datetime) -> List[Dict[str, Any]]:
         """Fetch news from API sources"""
@@ -167,8 +205,14 @@ class NewsDataConnector(BaseConnector):
         
         for feed_url in config.get("feeds", []):
             try:
-                # Parse RSS feed
-                feed = feedparser.parse(feed_url)
+                # Fetch through the shared (compressed) session, then parse the body
+                async with self.session.get(feed_url) as response:
+                    if response.status != 200:
+                        logger.error(f"RSS feed {feed_url} returned status {response.status}")
+                        continue
+                    body = await response.read()
+                
+                feed = feedparser.parse(body)
                 
                 for entry in feed.entries[:20]:  # Limit to 20 per feed
                     content = ""
@@ -273,21 +317,16 @@ class NewsDataConnector(BaseConnector):
         
         text_lower = text.lower()
         
-        # Simple keyword-based sentiment analysis
-        positive_words = [
-            'good', 'great', 'excellent', 'positive', 'success', 'win', 
-            'profit', 'growth', 'up', 'rise', 'bullish', 'optimistic'
-        ]
-        
-        negative_words = [
-            'bad', 'poor', 'negative', 'failure', 'loss', 'down',
-            'decline', 'fall', 'bearish', 'pessimistic', 'risk', 'warning'
-        ]
+        # Simple keyword-based sentiment analysis in a single regex pass
+        positive_count = 0
+        negative_count = 0
+        for match in _SENTIMENT_RE.finditer(text_lower):
+            if match.lastgroup == "p":
+                positive_count += 1
+            else:
+                negative_count += 1
         
         words = text_lower.split()
-        positive_count = sum(1 for word in words if word in positive_words)
-        negative_count = sum(1 for word in words if word in negative_words)
-        
         total_words = len(words)
         if total_words == 0:
             return 0.0
@@ -1,5 +1,8 @@
 import asyncio
+import heapq
+import hmac
 import json
+import time
 from typing import Dict, Any, List, Optional, Callable
 from datetime import datetime
 import aiohttp
@@ -9,6 +12,13 @@ from ...monitoring.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Request headers forwarded to data handlers with each webhook payload
+_PASS_HEADERS = ("user-agent", "x-webhook-source", "content-type", "x-forwarded-for")
+
+def _handler_name(handler: Callable) -> str:
+    """Name of a data handler for logs; partials and callable objects have no __name__"""
+    return getattr(handler, "__qualname__", repr(handler))
+
 class WebhookConnector:
     """Webhook connector for receiving real-time data"""
     
@@ -19,7 +29,9 @@ class WebhookConnector:
         self.runner = None
         self.site = None
         self.webhooks = {}
+        self._expire_heap = []  # (registered_ts, webhook_id), oldest first
         self.data_handlers = []
+        self.client_session = None
         
         # Setup routes
         self.app.router.add_post('/webhook/{webhook_id}', self.handle_webhook)
@@ -28,6 +40,8 @@ class WebhookConnector:
     
     async def start(self):
         """Start webhook server"""
+        self._get_client_session()
+        
         self.runner = web.AppRunner(self.app)
         await self.runner.setup()
         
@@ -42,9 +56,20 @@ class WebhookConnector:
             await self.site.stop()
         if self.runner:
             await self.cleanup()
+        if self.client_session:
+            await self.client_session.close()
+            self.client_session = None
         
         logger.info("Webhook server stopped")
     
+    def _get_client_session(self) -> aiohttp.ClientSession:
+        """Get the shared outgoing HTTP session, creating it on first use"""
+        if self.client_session is None or self.client_session.closed:
+            self.client_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=200, keepalive_timeout=60)
+            )
+        return self.client_session
+    
     async def handle_webhook(self, request: web.Request) -> web.Response:
         """Handle incoming webhook data"""
         webhook_id = request.match_info.get('webhook_id')
@@ -67,7 +92,11 @@ class WebhookConnector:
                 "data": data,
                 "timestamp": datetime.utcnow().isoformat(),
                 "client_ip": client_ip,
-                "headers": dict(request.headers),
+                "headers": {
+                    key: request.headers[key]
+                    for key in _PASS_HEADERS
+                    if key in request.headers
+                },
                 "data_type": "webhook_data"
             }
             
@@ -75,11 +104,11 @@ class WebhookConnector:
             if webhook_id in self.webhooks:
                 webhook_config = self.webhooks[webhook_id]
                 
-                # Verify secret if configured
-                secret = webhook_config.get("secret")
-                if secret:
-                    provided_secret = request.headers.get('X-Webhook-Secret')
-                    if provided_secret != secret:
+                # Verify secret if configured (constant-time compare)
+                secret_bytes = webhook_config.get("secret_bytes")
+                if secret_bytes:
+                    provided_secret = request.headers.get('X-Webhook-Secret', '')
+                    if not hmac.compare_digest(provided_secret.encode(), secret_bytes):
                         return web.Response(
                             status=401,
                             text="Invalid webhook secret"
@@ -127,12 +156,17 @@ class WebhookConnector:
                 )
             
             # Store webhook configuration
+            secret = data.get('secret')
+            registered_ts = time.time()
             self.webhooks[webhook_id] = {
-                "secret": data.get('secret'),
+                "secret": secret,
+                "secret_bytes": secret.encode() if secret else None,
                 "description": data.get('description'),
-                "registered_at": datetime.utcnow().isoformat(),
+                "registered_at": datetime.utcfromtimestamp(registered_ts).isoformat(),
+                "registered_ts": registered_ts,
                 "callback_url": data.get('callback_url')
             }
+            heapq.heappush(self._expire_heap, (registered_ts, webhook_id))
             
             logger.info(f"Webhook registered: {webhook_id}")
             
@@ -155,23 +189,27 @@ class WebhookConnector:
     
     async def _process_webhook_data(self, data: Dict[str, Any]):
         """Process incoming webhook data"""
-        # Call registered data handlers
-        for handler in self.data_handlers:
-            try:
-                await handler(data)
-            except Exception as e:
-                logger.error(f"Error in data handler: {e}")
+        # Call registered data handlers concurrently so a slow one doesn't block the rest
+        handlers = list(self.data_handlers)
+        results = await asyncio.gather(
+            *(handler(data) for handler in handlers),
+            return_exceptions=True
+        )
+        
+        for handler, result in zip(handlers, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error in data handler {_handler_name(handler)}: {result}")
     
     def register_data_handler(self, handler: Callable):
         """Register a data handler for incoming webhook data"""
         self.data_handlers.append(handler)
-        logger.info(f"Data handler registered: {handler.__name__}")
+        logger.info(f"Data handler registered: {_handler_name(handler)}")
     
     def unregister_data_handler(self, handler: Callable):
         """Unregister a data handler"""
         if handler in self.data_handlers:
             self.data_handlers.remove(handler)
-            logger.info(f"Data handler unregistered: {handler.__name__}")
+            logger.info(f"Data handler unregistered: {_handler_name(handler)}")
     
     async def send_webhook(self, url: str, data: Dict[str, Any], 
                           headers: Optional[Dict[str, str]] = None,
@@ -186,21 +224,21 @@ class WebhookConnector:
             if secret:
                 headers['X-Webhook-Secret'] = secret
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data, headers=headers) as response:
-                    response_text = await response.text()
-                    
-                    result = {
-                        "status_code": response.status,
-                        "success": 200 <= response.status < 300,
-                        "response": response_text,
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                    
-                    if response.status != 200:
-                        logger.warning(f"Webhook to {url} returned status {response.status}")
-                    
-                    return result
+            session = self._get_client_session()
+            async with session.post(url, json=data, headers=headers) as response:
+                response_text = await response.text()
+                
+                result = {
+                    "status_code": response.status,
+                    "success": 200 <= response.status < 300,
+                    "response": response_text,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+                
+                if response.status != 200:
+                    logger.warning(f"Webhook to {url} returned status {response.status}")
+                
+                return result
                     
         except Exception as e:
             logger.error(f"Error sending webhook to {url}: {e}")
@@ -234,21 +272,21 @@ class WebhookConnector:
         endpoint = f"http://{self.host}:{self.port}/webhook/{webhook_id}"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {}
-                if webhook_config.get("secret"):
-                    headers['X-Webhook-Secret'] = webhook_config["secret"]
+            session = self._get_client_session()
+            headers = {}
+            if webhook_config.get("secret"):
+                headers['X-Webhook-Secret'] = webhook_config["secret"]
+            
+            async with session.post(endpoint, json=test_data, headers=headers) as response:
+                response_text = await response.text()
                 
-                async with session.post(endpoint, json=test_data, headers=headers) as response:
-                    response_text = await response.text()
-                    
-                    return {
-                        "success": response.status == 200,
-                        "status_code": response.status,
-                        "response": response_text,
-                        "endpoint": endpoint,
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
+                return {
+                    "success": response.status == 200,
+                    "status_code": response.status,
+                    "response": response_text,
+                    "endpoint": endpoint,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
                     
         except Exception as e:
             return {
@@ -260,15 +298,16 @@ class WebhookConnector:
     async def cleanup(self):
         """Cleanup resources"""
         # Cleanup old webhook registrations (older than 30 days)
-        cutoff = datetime.utcnow() - timedelta(days=30)
-        
-        to_remove = []
-        for webhook_id, config in self.webhooks.items():
-            registered_at = datetime.fromisoformat(config["registered_at"])
-            if registered_at < cutoff:
-                to_remove.append(webhook_id)
+        cutoff_ts = time.time() - 30 * 24 * 3600
         
-        for webhook_id in to_remove:
+        while self._expire_heap and self._expire_heap[0][0] < cutoff_ts:
+            registered_ts, webhook_id = heapq.heappop(self._expire_heap)
+            
+            # Skip entries superseded by a later re-registration
+            config = self.webhooks.get(webhook_id)
+            if config is None or config["registered_ts"] != registered_ts:
+                continue
+            
             del self.webhooks[webhook_id]
             logger.info(f"Cleaned up old webhook: {webhook_id}")
 
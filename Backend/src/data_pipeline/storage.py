@@ -1,16 +1,57 @@
+import asyncio
 import pinecone
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
+import pandas as pd
+import torch
 from sentence_transformers import SentenceTransformer
 from ..config.settings import settings
 
+# Lookback window for each supported time_range name
+_TIME_DELTAS = {
+    "last_hour": timedelta(hours=1),
+    "last_6_hours": timedelta(hours=6),
+    "last_24_hours": timedelta(days=1),
+    "last_week": timedelta(weeks=1),
+    "last_month": timedelta(days=30),
+}
+
+# Queued by close(): the flusher writes out everything ahead of it, then exits
+_FLUSH_STOP = object()
+
 class TimeAwareVectorStore:
     """Vector store with time-based metadata filtering"""
     
+    # Pending writes and embeds are coalesced into one encode (+ one upsert) per batch
+    BATCH_SIZE = 64
+    FLUSH_MS = 50
+    
+    # Connection pool size of the Pinecone client (bounds concurrent upserts)
+    UPSERT_POOL_THREADS = 30
+    
+    # Recent query embeddings kept in an LRU so repeated searches skip the model
+    QUERY_CACHE_SIZE = 1024
+    
     def __init__(self):
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+        if device == 'cuda':
+            self.embedding_model.half()
+        
+        # Single worker pinned to the encoder so forward passes run off the event loop
+        self._embed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
         self.index = None
+        self._store_queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._upsert_tasks = set()
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
         
     def initialize(self):
         """Initialize Pinecone index"""
@@ -30,17 +71,64 @@ class TimeAwareVectorStore:
                 }
             )
         
-        self.index = pinecone.Index(settings.PINECONE_INDEX)
+        # Pooled client so batched upserts can be in flight while the next batch embeds
+        self.index = pinecone.Index(settings.PINECONE_INDEX, pool_threads=self.UPSERT_POOL_THREADS)
     
     def create_embedding(self, text: str) -> List[float]:
         """Create embedding for text"""
-        return self.embedding_model.encode(text).tolist()
+        return self._encode([text])[0].tolist()
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """Create the embedding for a search query, reusing recent ones"""
+        embedding = self._query_cache.get(query)
+        if embedding is not None:
+            self._query_cache.move_to_end(query)
+            self.query_cache_hits += 1
+            return embedding
+        
+        self.query_cache_misses += 1
+        embedding = self.create_embedding(query)
+        self._cache_query_embedding(query, embedding)
+        return embedding
+    
+    def _cache_query_embedding(self, query: str, embedding: List[float]):
+        """Add a query embedding to the LRU, evicting the oldest past QUERY_CACHE_SIZE"""
+        self._query_cache[query] = embedding
+        if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+    
+    async def embed_query_async(self, query: str) -> List[float]:
+        """Query embedding via the LRU, computed in the next batched forward pass on a miss"""
+        embedding = self._query_cache.get(query)
+        if embedding is not None:
+            self._query_cache.move_to_end(query)
+            self.query_cache_hits += 1
+            return embedding
+        
+        self.query_cache_misses += 1
+        embedding = await self.create_embedding_async(query)
+        self._cache_query_embedding(query, embedding)
+        return embedding
+    
+    async def create_embedding_async(self, text: str) -> List[float]:
+        """Create embedding for text as part of the next batched forward pass"""
+        return await self._enqueue(None, text, None)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the embedding model over a list of texts in one forward pass"""
+        with torch.inference_mode():
+            return self.embedding_model.encode(
+                texts,
+                batch_size=self.BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
     
     async def store_data(self, data: Dict[str, Any]) -> str:
         """Store data with timestamp metadata"""
         # Prepare text for embedding
         text_content = self._prepare_text_for_embedding(data)
-        embedding = self.create_embedding(text_content)
         
         # Create unique ID with timestamp
         doc_id = f"{data.get('data_type', 'unknown')}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}"
@@ -52,9 +140,147 @@ class TimeAwareVectorStore:
             "text_content": text_content[:1000]  # Store truncated text
         }
         
-        # Store in vector DB
-        self.index.upsert(vectors=[(doc_id, embedding, metadata)])
-        return doc_id
+        # Queue for the next batched embed + upsert and wait for it to land
+        return await self._enqueue(doc_id, text_content, metadata)
+    
+    async def store_data_batch(self, data_list: List[Dict[str, Any]]) -> List[str]:
+        """Store several items; they are queued together so they share one embed + upsert"""
+        return await asyncio.gather(*(self.store_data(data) for data in data_list))
+    
+    async def _enqueue(self, doc_id: Optional[str], text: str, metadata: Optional[Dict[str, Any]]):
+        """Queue a text for the next batch; entries without a doc_id are embed-only"""
+        if self._closed:
+            raise RuntimeError("Vector store is closed")
+        self._ensure_flusher()
+        future = asyncio.get_running_loop().create_future()
+        await self._store_queue.put((doc_id, text, metadata, future))
+        return await future
+    
+    def _ensure_flusher(self):
+        """Start the background batch flusher on first use (or restart it on the same queue)"""
+        if self._store_queue is None:
+            self._store_queue = asyncio.Queue()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        """Collect queued writes into batches of BATCH_SIZE or FLUSH_MS, whichever comes first"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            entry = await self._store_queue.get()
+            if entry is _FLUSH_STOP:
+                return
+            batch = [entry]
+            deadline = loop.time() + self.FLUSH_MS / 1000
+            
+            while len(batch) < self.BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._store_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _FLUSH_STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            
+            try:
+                await self._flush_batch(batch)
+            except asyncio.CancelledError:
+                # Callers awaiting this batch would otherwise wait forever
+                self._fail_futures(batch, RuntimeError("Vector store flusher was cancelled"))
+                raise
+    
+    @staticmethod
+    def _fail_futures(batch: List[Tuple[Optional[str], str, Optional[Dict[str, Any]], asyncio.Future]], error: Exception):
+        """Fail every still-pending future in a batch"""
+        for _, _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+    
+    async def _flush_batch(self, batch: List[Tuple[Optional[str], str, Optional[Dict[str, Any]], asyncio.Future]]):
+        """Embed a batch on the embed worker, start its upsert, and resolve each caller's future"""
+        loop = asyncio.get_running_loop()
+        try:
+            embeddings, pending_upsert = await loop.run_in_executor(
+                self._embed_executor, self._embed_and_upsert, batch
+            )
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        # Embed-only callers don't need to wait for the upsert
+        for (doc_id, _, _, future), embedding in zip(batch, embeddings):
+            if doc_id is None and not future.done():
+                future.set_result(embedding.tolist())
+        
+        if pending_upsert is not None:
+            # Wait for the upsert in the background so the next batch can start embedding
+            task = asyncio.create_task(self._finish_upsert(batch, pending_upsert))
+            self._upsert_tasks.add(task)
+            task.add_done_callback(self._upsert_tasks.discard)
+    
+    async def _finish_upsert(self, batch: List[Tuple[Optional[str], str, Optional[Dict[str, Any]], asyncio.Future]], pending_upsert):
+        """Wait for an in-flight upsert and resolve the write futures of its batch"""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, pending_upsert.get)
+        except Exception as e:
+            for doc_id, _, _, future in batch:
+                if doc_id is not None and not future.done():
+                    future.set_exception(e)
+            return
+        
+        for doc_id, _, _, future in batch:
+            if doc_id is not None and not future.done():
+                future.set_result(doc_id)
+    
+    def _embed_and_upsert(self, batch: List[Tuple[Optional[str], str, Optional[Dict[str, Any]], asyncio.Future]]):
+        """Embed a batch in one forward pass and start the upsert of its writes (runs on the embed worker)"""
+        embeddings = self._encode([text for _, text, _, _ in batch])
+        
+        vectors = [
+            (doc_id, embedding.tolist(), metadata)
+            for (doc_id, _, metadata, _), embedding in zip(batch, embeddings)
+            if doc_id is not None
+        ]
+        pending_upsert = self.index.upsert(vectors=vectors, async_req=True) if vectors else None
+        
+        return embeddings, pending_upsert
+    
+    async def close(self):
+        """Flush queued writes, then stop the background batch flusher"""
+        # Stop accepting work; everything already queued is still written
+        self._closed = True
+        
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._store_queue.put(_FLUSH_STOP)
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        
+        # Entries the flusher never reached (e.g. it was cancelled) fail instead of hanging
+        if self._store_queue is not None:
+            leftover = []
+            while not self._store_queue.empty():
+                entry = self._store_queue.get_nowait()
+                if entry is not _FLUSH_STOP:
+                    leftover.append(entry)
+            self._fail_futures(leftover, RuntimeError("Vector store is closed"))
+        
+        # Let in-flight upserts land before shutting down
+        if self._upsert_tasks:
+            await asyncio.gather(*self._upsert_tasks, return_exceptions=True)
+        
+        self._embed_executor.shutdown(wait=False)
     
     def _prepare_text_for_embedding(self, data: Dict[str, Any]) -> str:
         """Prepare data for embedding creation"""
@@ -86,22 +312,12 @@ class TimeAwareVectorStore:
     ) -> List[Dict[str, Any]]:
         """Search with time-based filtering"""
         # Create query embedding
-        query_embedding = self.create_embedding(query)
-        
-        # Parse time range
-        time_filter = self._parse_time_range(time_range)
-        
-        # Combine filters
-        combined_filters = {}
-        if time_filter:
-            combined_filters.update(time_filter)
-        if filters:
-            combined_filters.update(filters)
+        query_embedding = self._embed_query(query)
         
         # Perform search
         results = self.index.query(
             vector=query_embedding,
-            filter=combined_filters if combined_filters else None,
+            filter=self._combined_filter(time_range, filters),
             top_k=top_k,
             include_metadata=True
         )
@@ -110,23 +326,69 @@ class TimeAwareVectorStore:
         processed = self._apply_time_decay_ranking(results.matches)
         return processed
     
+    async def search_batch(
+        self,
+        queries: List[str],
+        time_range: str = "last_24_hours",
+        filters: Optional[Dict] = None,
+        top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """Run search_with_time_filter for several queries sharing one filter.
+        
+        Uncached query embeddings are computed in a single forward pass on the
+        embed worker, and the index queries then run concurrently on the
+        client's connection pool.
+        """
+        loop = asyncio.get_running_loop()
+        
+        vectors = {}
+        missing = []
+        for query in dict.fromkeys(queries):
+            embedding = self._query_cache.get(query)
+            if embedding is None:
+                missing.append(query)
+            else:
+                self._query_cache.move_to_end(query)
+                vectors[query] = embedding
+        self.query_cache_hits += len(queries) - len(missing)
+        self.query_cache_misses += len(missing)
+        
+        if missing:
+            embeddings = await loop.run_in_executor(self._embed_executor, self._encode, missing)
+            for query, embedding in zip(missing, embeddings):
+                vectors[query] = embedding.tolist()
+                self._cache_query_embedding(query, vectors[query])
+        
+        combined_filter = self._combined_filter(time_range, filters)
+        results = await asyncio.gather(*(
+            loop.run_in_executor(None, partial(
+                self.index.query,
+                vector=vectors[query],
+                filter=combined_filter,
+                top_k=top_k,
+                include_metadata=True
+            ))
+            for query in queries
+        ))
+        
+        return [self._apply_time_decay_ranking(result.matches) for result in results]
+    
+    def _combined_filter(self, time_range: str, filters: Optional[Dict]) -> Optional[Dict[str, Any]]:
+        """Time range filter merged with any metadata filters"""
+        combined_filters = {}
+        time_filter = self._parse_time_range(time_range)
+        if time_filter:
+            combined_filters.update(time_filter)
+        if filters:
+            combined_filters.update(filters)
+        
+        return combined_filters if combined_filters else None
+    
     def _parse_time_range(self, time_range: str) -> Dict[str, Any]:
         """Parse time range string to filter"""
-        now = datetime.utcnow()
-        
-        if time_range == "last_hour":
-            start_time = now - timedelta(hours=1)
-        elif time_range == "last_6_hours":
-            start_time = now - timedelta(hours=6)
-        elif time_range == "last_24_hours":
-            start_time = now - timedelta(days=1)
-        elif time_range == "last_week":
-            start_time = now - timedelta(weeks=1)
-        elif time_range == "last_month":
-            start_time = now - timedelta(days=30)
-        else:
-            # Default to 24 hours
-            start_time = now - timedelta(days=1)
+        # Unknown ranges default to 24 hours
+        delta = _TIME_DELTAS.get(time_range, _TIME_DELTAS["last_24_hours"])
+        start_time = datetime.utcnow() - delta
         
         return {
             "timestamp": {"$gte": start_time.isoformat()}
@@ -134,33 +396,31 @@ class TimeAwareVectorStore:
     
     def _apply_time_decay_ranking(self, matches: List) -> List[Dict[str, Any]]:
         """Apply time decay to search results"""
-        ranked_results = []
+        if not matches:
+            return []
         
-        for match in matches:
-            score = match.score
-            metadata = match.metadata
-            
-            # Apply time decay if timestamp exists
-            if "timestamp" in metadata:
-                try:
-                    doc_time = datetime.fromisoformat(metadata["timestamp"].replace('Z', '+00:00'))
-                    hours_old = (datetime.utcnow() - doc_time).total_seconds() / 3600
-                    
-                    # Exponential decay: e^(-0.1 * hours_old)
-                    time_decay = np.exp(-0.1 * hours_old)
-                    adjusted_score = score * (0.3 + 0.7 * time_decay)  # 30% base + 70% time adjusted
-                except:
-                    adjusted_score = score
-            else:
-                adjusted_score = score
-            
-            ranked_results.append({
-                "id": match.id,
-                "score": adjusted_score,
-                "metadata": metadata,
-                "original_score": score
-            })
-        
-        # Sort by adjusted score
-        ranked_results.sort(key=lambda x: x["score"], reverse=True)
-        return ranked_results
\ No newline at end of file
+        scores = np.array([match.score for match in matches], dtype=np.float64)
+        
+        # Parse all timestamps at once; missing or unparseable ones become NaT
+        doc_times = pd.to_datetime(
+            [match.metadata.get("timestamp") for match in matches],
+            utc=True, errors="coerce", format="ISO8601"
+        )
+        hours_old = ((pd.Timestamp.now(tz="UTC") - doc_times) / pd.Timedelta(hours=1)).to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        # Exponential decay: e^(-0.1 * hours_old); 30% base + 70% time adjusted
+        time_decay = np.exp(-0.1 * hours_old)
+        adjusted = np.where(np.isnan(hours_old), scores, scores * (0.3 + 0.7 * time_decay))
+        
+        # Sort by adjusted score (stable, highest first)
+        order = np.argsort(-adjusted, kind="stable")
+        
+        return [
+            {
+                "id": matches[i].id,
+                "score": float(adjusted[i]),
+                "metadata": matches[i].metadata,
+                "original_score": matches[i].score
+            }
+            for i in order.tolist()
+        ]
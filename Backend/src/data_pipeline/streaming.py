@@ -1,10 +1,12 @@
 import asyncio
-import json
+import time
+import msgpack
+from dataclasses import dataclass
 from typing import Dict, Any, List, Optional, AsyncGenerator, Callable
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import redis.asyncio as redis
-from ...config.settings import settings
-from ...monitoring.logger import get_logger
+from ..config.settings import settings
+from ..monitoring.logger import get_logger
 from .connectors.financial import FinancialDataConnector
 from .connectors.news import NewsDataConnector
 from .connectors.custom import CustomDataConnector
@@ -13,42 +15,124 @@ from .storage import TimeAwareVectorStore
 
 logger = get_logger(__name__)
 
+def _ns_to_iso(ns: int) -> str:
+    """Format an epoch-nanosecond timestamp as a UTC ISO string (only at serialization time)"""
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+# Channel every stream message is also published to
+_UPDATES_CHANNEL = b"data:updates"
+
+@dataclass(slots=True)
+class StreamState:
+    """Bookkeeping for one running stream; counters are bumped on every message"""
+    type: str
+    task: asyncio.Task
+    config: Dict[str, Any]
+    started_ns: int  # epoch ns; uptime uses started_monotonic
+    started_monotonic: float = 0.0
+    status: str = "running"
+    message_count: int = 0
+    error_count: int = 0
+    stopped_ns: Optional[int] = None
+    pubsub_channel: bytes = b""  # precomputed Redis channel / stream key names
+    xadd_key: bytes = b""
+    
+    def to_public(self, stream_id: str) -> Dict[str, Any]:
+        """Shape used by list_streams"""
+        return {
+            "stream_id": stream_id,
+            "type": self.type,
+            "status": self.status,
+            "started_at": _ns_to_iso(self.started_ns),
+            "message_count": self.message_count,
+            "error_count": self.error_count,
+            "config": self.config
+        }
+
 class DataStreamManager:
     """Manager for real-time data streams"""
     
+    # Redis writes are coalesced into one pipeline of up to PUBLISH_BATCH messages
+    # or PUBLISH_DELAY_MS, whichever comes first; producers block once the queue is full
+    PUBLISH_BATCH = 256
+    PUBLISH_DELAY_MS = 20
+    PUBLISH_QUEUE_SIZE = 10_000
+    
+    # Processed items are handed to the vector store in batches of STORE_BATCH or every STORE_FLUSH_MS
+    STORE_BATCH = 64
+    STORE_FLUSH_MS = 500
+    
+    # Redis streams keep about STREAM_MAXLEN entries (approximate MAXLEN ~ trimming), or,
+    # when STREAM_RETENTION_SECONDS is set, entries newer than that (approximate MINID ~)
+    STREAM_MAXLEN = 1000
+    STREAM_RETENTION_SECONDS: Optional[int] = None
+    
+    # Max items being processed at once across all streams
+    PROCESS_CONCURRENCY = 16
+    
+    # Stream loops explicitly yield to the event loop every YIELD_EVERY items
+    YIELD_EVERY = 16
+    
     def __init__(self):
         self.redis_client = None
-        self.streams = {}
+        self.redis_pool = None
+        self._publish_client = None
+        self.streams: Dict[str, StreamState] = {}
         self.subscribers = {}
         self.processor = None
         self.vector_store = None
+        self.on_data: Optional[Callable] = None
         self.is_running = False
         
+        # Reused for every published message; non-msgpack types fall back to str
+        self._packer = msgpack.Packer(use_bin_type=True, default=str)
+        self._publish_queue: Optional[asyncio.Queue] = None
+        self._publish_task: Optional[asyncio.Task] = None
+        self._store_buf: List[Dict[str, Any]] = []
+        self._store_flush_task: Optional[asyncio.Task] = None
+        
         # Initialize connectors
         self.financial_connector = FinancialDataConnector()
         self.news_connector = NewsDataConnector()
         self.custom_connector = CustomDataConnector()
         
         # Statistics
+        self._started_monotonic = time.monotonic()
         self.stats = {
             "total_messages": 0,
             "active_streams": 0,
             "subscribers": 0,
             "errors": 0,
-            "last_update": datetime.utcnow().isoformat()
+            "last_update_ns": time.time_ns()  # formatted on read in get_system_stats
         }
     
-    async def initialize(self, processor: DataProcessor, vector_store: TimeAwareVectorStore):
-        """Initialize stream manager"""
+    async def initialize(self, processor: DataProcessor, vector_store: TimeAwareVectorStore,
+                         on_data: Optional[Callable] = None):
+        """Initialize stream manager; on_data(stream_id, data) is awaited for every processed item"""
         self.processor = processor
         self.vector_store = vector_store
+        self.on_data = on_data
+        self._process_sem = asyncio.Semaphore(self.PROCESS_CONCURRENCY)
         
-        # Initialize Redis
-        self.redis_client = redis.from_url(
+        # Initialize Redis (binary responses; stream payloads are msgpack)
+        self.redis_pool = redis.ConnectionPool.from_url(
             settings.REDIS_URL,
-            encoding="utf-8",
-            decode_responses=True
+            max_connections=32,
+            decode_responses=False
+        )
+        self.redis_client = redis.Redis(connection_pool=self.redis_pool)
+        
+        # The publish worker gets its own connection so its pipelines never
+        # wait on the shared pool behind reads like get_stream_history
+        self._publish_client = redis.Redis(
+            connection_pool=redis.BlockingConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=1,
+                decode_responses=False
+            )
         )
+        self._publish_queue = asyncio.Queue(maxsize=self.PUBLISH_QUEUE_SIZE)
+        self._publish_task = asyncio.create_task(self._publish_worker())
         
         # Initialize connectors
         await self.financial_connector.connect()
@@ -59,7 +143,7 @@ class DataStreamManager:
     
     async def start_stream(self, stream_type: str, config: Optional[Dict[str, Any]] = None) -> str:
         """Start a new data stream"""
-        stream_id = f"{stream_type}_{datetime.utcnow().timestamp()}"
+        stream_id = f"{stream_type}_{time.time()}"
         
         if stream_type == "financial":
             stream_task = asyncio.create_task(self._run_financial_stream(stream_id, config))
@@ -71,42 +155,64 @@ class DataStreamManager:
         else:
             raise ValueError(f"Unknown stream type: {stream_type}")
         
-        self.streams[stream_id] = {
-            "type": stream_type,
-            "task": stream_task,
-            "config": config or {},
-            "started_at": datetime.utcnow().isoformat(),
-            "status": "running",
-            "message_count": 0,
-            "error_count": 0
-        }
+        # A restarted custom stream replaces its entry; only count it once
+        previous = self.streams.get(stream_id)
+        if previous is None or previous.status != "running":
+            self.stats["active_streams"] += 1
+        
+        self.streams[stream_id] = StreamState(
+            type=stream_type,
+            task=stream_task,
+            config=config or {},
+            started_ns=time.time_ns(),
+            started_monotonic=time.monotonic(),
+            pubsub_channel=f"stream:{stream_id}".encode(),
+            xadd_key=f"stream:data:{stream_id}".encode()
+        )
         
-        self.stats["active_streams"] = len(self.streams)
         logger.info(f"Started {stream_type} stream: {stream_id}")
         
         return stream_id
     
+    async def _process_one(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Process one item, limited to PROCESS_CONCURRENCY in flight across streams"""
+        async with self._process_sem:
+            return await self.processor.process(item)
+    
+    async def _process_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process a fetched batch: one vectorized call under one semaphore slot if supported, else via _process_one"""
+        async with self._process_sem:
+            processed_list = await self.processor.process_vectorized(items)
+        
+        if processed_list is None:
+            processed_list = await asyncio.gather(*(self._process_one(item) for item in items))
+        return processed_list
+    
     async def _run_financial_stream(self, stream_id: str, config: Dict[str, Any]):
         """Run financial data stream"""
         symbols = config.get("symbols", ["AAPL", "GOOGL", "TSLA", "MSFT", "AMZN"])
         interval = config.get("interval", 60)  # seconds
+        state = self.streams[stream_id]
         
         while self.is_running and stream_id in self.streams:
             try:
                 # Fetch financial data
                 quotes = await self.financial_connector.fetch_realtime_quotes()
                 
-                for quote in quotes:
-                    if quote:
-                        # Process and store
-                        processed = await self.processor.process(quote)
-                        await self._handle_stream_data(stream_id, processed)
+                # Process as one batch (vectorized for quotes), then store/publish in order
+                processed_list = await self._process_batch([quote for quote in quotes if quote])
+                for i, processed in enumerate(processed_list, 1):
+                    await self._handle_stream_data(stream_id, processed)
+                    
+                    # Let other tasks (WebSocket sends, accepts) run during long batches
+                    if i % self.YIELD_EVERY == 0:
+                        await asyncio.sleep(0)
                 
                 # Update stream stats
-                self.streams[stream_id]["message_count"] += len(quotes)
+                state.message_count += len(quotes)
                 
             except Exception as e:
-                self.streams[stream_id]["error_count"] += 1
+                state.error_count += 1
                 self.stats["errors"] += 1
                 logger.error(f"Error in financial stream {stream_id}: {e}")
             
@@ -117,6 +223,7 @@ class DataStreamManager:
         """Run news data stream"""
         interval = config.get("interval", 300)  # 5 minutes
         keywords = config.get("keywords", [])
+        state = self.streams[stream_id]
         
         while self.is_running and stream_id in self.streams:
             try:
@@ -126,16 +233,20 @@ class DataStreamManager:
                 else:
                     articles = await self.news_connector.fetch_news(limit=20)
                 
-                for article in articles:
-                    # Process and store
-                    processed = await self.processor.process(article)
+                # Process as one batch (per-item unless vectorized), then store/publish in order
+                processed_list = await self._process_batch(articles)
+                for i, processed in enumerate(processed_list, 1):
                     await self._handle_stream_data(stream_id, processed)
+                    
+                    # Let other tasks (WebSocket sends, accepts) run during long batches
+                    if i % self.YIELD_EVERY == 0:
+                        await asyncio.sleep(0)
                 
                 # Update stream stats
-                self.streams[stream_id]["message_count"] += len(articles)
+                state.message_count += len(articles)
                 
             except Exception as e:
-                self.streams[stream_id]["error_count"] += 1
+                state.error_count += 1
                 self.stats["errors"] += 1
                 logger.error(f"Error in news stream {stream_id}: {e}")
             
@@ -147,6 +258,7 @@ class DataStreamManager:
         source_id = config.get("source_id")
         if not source_id:
             raise ValueError("source_id required for custom stream")
+        state = self.streams[stream_id]
         
         try:
             async for data in self.custom_connector.stream_data(source_id):
@@ -159,31 +271,39 @@ class DataStreamManager:
                     await self._handle_stream_data(stream_id, processed)
                     
                     # Update stream stats
-                    self.streams[stream_id]["message_count"] += 1
+                    state.message_count += 1
                     
                 except Exception as e:
-                    self.streams[stream_id]["error_count"] += 1
+                    state.error_count += 1
                     self.stats["errors"] += 1
                     logger.error(f"Error processing custom stream data {stream_id}: {e}")
                     
         except Exception as e:
-            self.streams[stream_id]["error_count"] += 1
+            state.error_count += 1
             self.stats["errors"] += 1
             logger.error(f"Error in custom stream {stream_id}: {e}")
     
     async def _handle_stream_data(self, stream_id: str, data: Dict[str, Any]):
         """Handle stream data: store, publish, and notify"""
         try:
-            # Store in vector database
+            # Buffer for the next batched vector store write
             if self.vector_store and "error" not in data:
-                await self.vector_store.store_data(data)
+                self._store_buf.append(data)
+                if len(self._store_buf) >= self.STORE_BATCH:
+                    await self._flush_store_buffer()
+                elif self._store_flush_task is None:
+                    self._store_flush_task = asyncio.create_task(self._delayed_store_flush())
             
             # Publish to Redis for real-time subscribers
             await self._publish_to_redis(stream_id, data)
             
+            # Notify in-process listeners (e.g. WebSocket broadcast)
+            if self.on_data:
+                await self.on_data(stream_id, data)
+            
             # Update statistics
             self.stats["total_messages"] += 1
-            self.stats["last_update"] = datetime.utcnow().isoformat()
+            self.stats["last_update_ns"] = time.time_ns()
             
             # Log periodically
             if self.stats["total_messages"] % 100 == 0:
@@ -192,8 +312,30 @@ class DataStreamManager:
         except Exception as e:
             logger.error(f"Error handling stream data: {e}")
     
+    async def _delayed_store_flush(self):
+        """Flush the store buffer once STORE_FLUSH_MS has passed"""
+        await asyncio.sleep(self.STORE_FLUSH_MS / 1000)
+        self._store_flush_task = None
+        await self._flush_store_buffer()
+    
+    async def _flush_store_buffer(self):
+        """Write all buffered items to the vector store in one batch"""
+        if self._store_flush_task is not None:
+            self._store_flush_task.cancel()
+        self._store_flush_task = None
+        
+        # Swap the buffer out before awaiting so new items start a fresh batch
+        batch, self._store_buf = self._store_buf, []
+        if not batch:
+            return
+        
+        try:
+            await self.vector_store.store_data_batch(batch)
+        except Exception as e:
+            logger.error(f"Error storing {len(batch)} stream items: {e}")
+    
     async def _publish_to_redis(self, stream_id: str, data: Dict[str, Any]):
-        """Publish data to Redis channels"""
+        """Queue data for the next batched publish to Redis channels"""
         if not self.redis_client:
             return
         
@@ -202,39 +344,75 @@ class DataStreamManager:
             message = {
                 "stream_id": stream_id,
                 "data": data,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": time.time_ns(),  # epoch ns; packs as a msgpack uint64
                 "type": "data_update"
             }
             
-            # Publish to stream-specific channel
-            await self.redis_client.publish(
-                f"stream:{stream_id}",
-                json.dumps(message)
-            )
+            # Channel names are precomputed per stream; fall back for unregistered ids
+            state = self.streams.get(stream_id)
+            if state is not None:
+                pubsub_channel, xadd_key = state.pubsub_channel, state.xadd_key
+            else:
+                pubsub_channel, xadd_key = f"stream:{stream_id}".encode(), f"stream:data:{stream_id}".encode()
             
-            # Publish to general data channel
-            await self.redis_client.publish(
-                "data:updates",
-                json.dumps(message)
-            )
-            
-            # Store in Redis stream for persistence
-            await self.redis_client.xadd(
-                f"stream:data:{stream_id}",
-                {"data": json.dumps(message)},
-                maxlen=1000  # Keep last 1000 messages
-            )
+            # Serialize once and reuse the bytes for every sink
+            await self._publish_queue.put((pubsub_channel, xadd_key, self._packer.pack(message)))
             
         except Exception as e:
             logger.error(f"Redis publish error: {e}")
     
+    async def _publish_worker(self):
+        """Drain the publish queue into pipelined batches"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._publish_queue.get()]
+            deadline = loop.time() + self.PUBLISH_DELAY_MS / 1000
+            
+            while len(batch) < self.PUBLISH_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._publish_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await self._flush_publishes(batch)
+    
+    async def _flush_publishes(self, batch: List[tuple]):
+        """Send a batch of (pubsub_channel, xadd_key, payload) messages in one round-trip"""
+        if self.STREAM_RETENTION_SECONDS:
+            # Stream ids are "<ms>-<seq>", so a time cutoff is a MINID
+            cutoff_ms = int((time.time() - self.STREAM_RETENTION_SECONDS) * 1000)
+            trim = {"minid": f"{cutoff_ms}-0", "approximate": True}
+        else:
+            trim = {"maxlen": self.STREAM_MAXLEN, "approximate": True}
+        
+        try:
+            async with self._publish_client.pipeline(transaction=False) as pipe:
+                for pubsub_channel, xadd_key, payload in batch:
+                    # Publish to stream-specific channel
+                    pipe.publish(pubsub_channel, payload)
+                    
+                    # Publish to general data channel
+                    pipe.publish(_UPDATES_CHANNEL, payload)
+                    
+                    # Store in Redis stream for persistence
+                    pipe.xadd(xadd_key, {b"d": payload}, **trim)  # single short field key
+                
+                await pipe.execute()
+            
+        except Exception as e:
+            logger.error(f"Redis publish error ({len(batch)} messages): {e}")
+    
     async def subscribe(self, stream_id: str, callback: Callable):
         """Subscribe to a data stream"""
         if stream_id not in self.subscribers:
             self.subscribers[stream_id] = []
         
         self.subscribers[stream_id].append(callback)
-        self.stats["subscribers"] = sum(len(callbacks) for callbacks in self.subscribers.values())
+        self.stats["subscribers"] += 1
         
         logger.info(f"New subscriber for stream {stream_id}")
         
@@ -242,7 +420,7 @@ class DataStreamManager:
         def unsubscribe():
             if stream_id in self.subscribers and callback in self.subscribers[stream_id]:
                 self.subscribers[stream_id].remove(callback)
-                self.stats["subscribers"] = sum(len(callbacks) for callbacks in self.subscribers.values())
+                self.stats["subscribers"] -= 1
                 logger.info(f"Unsubscribed from stream {stream_id}")
         
         return unsubscribe
@@ -259,12 +437,11 @@ class DataStreamManager:
                 count=limit
             )
             
-            history = []
-            for msg_id, msg_data in messages:
-                data = json.loads(msg_data["data"])
-                history.append(data)
-            
-            return history
+            # Entries written before the short field key still use b"data"
+            return [
+                msgpack.unpackb(msg_data.get(b"d") or msg_data[b"data"], raw=False)
+                for msg_id, msg_data in messages
+            ]
             
         except Exception as e:
             logger.error(f"Error getting stream history: {e}")
@@ -274,20 +451,21 @@ class DataStreamManager:
         """Stop a data stream"""
         if stream_id in self.streams:
             stream_info = self.streams[stream_id]
-            stream_info["status"] = "stopping"
+            if stream_info.status == "running":
+                self.stats["active_streams"] -= 1
+            stream_info.status = "stopping"
             
             # Cancel the stream task
-            stream_info["task"].cancel()
+            stream_info.task.cancel()
             try:
-                await stream_info["task"]
+                await stream_info.task
             except asyncio.CancelledError:
                 pass
             
             # Update status
-            stream_info["status"] = "stopped"
-            stream_info["stopped_at"] = datetime.utcnow().isoformat()
+            stream_info.status = "stopped"
+            stream_info.stopped_ns = time.time_ns()
             
-            self.stats["active_streams"] = len([s for s in self.streams.values() if s["status"] == "running"])
             logger.info(f"Stopped stream: {stream_id}")
             
             return True
@@ -323,18 +501,7 @@ class DataStreamManager:
     
     def list_streams(self) -> List[Dict[str, Any]]:
         """List all active streams"""
-        return [
-            {
-                "stream_id": stream_id,
-                "type": info["type"],
-                "status": info["status"],
-                "started_at": info["started_at"],
-                "message_count": info["message_count"],
-                "error_count": info["error_count"],
-                "config": info["config"]
-            }
-            for stream_id, info in self.streams.items()
-        ]
+        return [info.to_public(stream_id) for stream_id, info in self.streams.items()]
     
     def get_stream_stats(self, stream_id: str) -> Optional[Dict[str, Any]]:
         """Get statistics for a specific stream"""
@@ -344,43 +511,43 @@ class DataStreamManager:
         info = self.streams[stream_id]
         
         # Calculate uptime
-        started = datetime.fromisoformat(info["started_at"])
-        uptime_seconds = (datetime.utcnow() - started).total_seconds()
+        uptime_seconds = time.monotonic() - info.started_monotonic
         
         # Calculate message rate
         if uptime_seconds > 0:
-            message_rate = info["message_count"] / uptime_seconds
+            message_rate = info.message_count / uptime_seconds
         else:
             message_rate = 0
         
         return {
             "stream_id": stream_id,
-            "type": info["type"],
-            "status": info["status"],
+            "type": info.type,
+            "status": info.status,
             "uptime_seconds": uptime_seconds,
-            "message_count": info["message_count"],
-            "error_count": info["error_count"],
+            "message_count": info.message_count,
+            "error_count": info.error_count,
             "message_rate_per_second": message_rate,
-            "error_rate": info["error_count"] / max(info["message_count"], 1),
-            "config": info["config"]
+            "error_rate": info.error_count / max(info.message_count, 1),
+            "config": info.config
         }
     
     async def get_system_stats(self) -> Dict[str, Any]:
         """Get overall system statistics"""
         # Calculate additional stats
-        total_messages = sum(info["message_count"] for info in self.streams.values())
-        total_errors = sum(info["error_count"] for info in self.streams.values())
+        total_messages = sum(info.message_count for info in self.streams.values())
+        total_errors = sum(info.error_count for info in self.streams.values())
+        
+        stats = dict(self.stats)
+        stats["last_update"] = _ns_to_iso(stats.pop("last_update_ns"))
         
         return {
-            **self.stats,
+            **stats,
             "total_messages": total_messages,
             "total_errors": total_errors,
             "error_rate": total_errors / max(total_messages, 1),
             "stream_count": len(self.streams),
-            "running_streams": len([s for s in self.streams.values() if s["status"] == "running"]),
-            "uptime_seconds": (
-                datetime.utcnow() - datetime.fromisoformat(self.stats.get("started_at", datetime.utcnow().isoformat()))
-            ).total_seconds()
+            "running_streams": len([s for s in self.streams.values() if s.status == "running"]),
+            "uptime_seconds": time.monotonic() - self._started_monotonic
         }
     
     async def cleanup(self):
@@ -388,9 +555,31 @@ class DataStreamManager:
         # Stop all streams
         await self.stop_all_streams()
         
+        # Write any buffered items to the vector store
+        await self._flush_store_buffer()
+        
+        # Stop the publisher, sending anything still queued
+        if self._publish_task:
+            self._publish_task.cancel()
+            try:
+                await self._publish_task
+            except asyncio.CancelledError:
+                pass
+            self._publish_task = None
+            
+            pending = []
+            while not self._publish_queue.empty():
+                pending.append(self._publish_queue.get_nowait())
+            if pending:
+                await self._flush_publishes(pending)
+        
         # Close Redis connection
+        if self._publish_client:
+            await self._publish_client.close()
+            await self._publish_client.connection_pool.disconnect()
         if self.redis_client:
             await self.redis_client.close()
+            await self.redis_pool.disconnect()
         
         # Close connectors
         await self.financial_connector.close()
@@ -3,12 +3,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from contextlib import asynccontextmanager
 import asyncio
+from datetime import datetime
 from typing import Dict, List
-import json
+import orjson
 
 from .config.settings import settings
-from .data_pipeline.connectors.financial import FinancialDataConnector
+from .data_pipeline.processor import DataProcessor
 from .data_pipeline.storage import TimeAwareVectorStore
+from .data_pipeline.streaming import DataStreamManager
 from .rag_engine.retriever import TimeAwareRetriever
 from .action_engine.decision_maker import ActionDecisionEngine
 from .action_engine.registry import ActionRegistry
@@ -16,12 +18,19 @@ from .monitoring.logger import get_logger
 
 logger = get_logger(__name__)
 
+def _json_text(obj) -> str:
+    """Serialize a WebSocket message with orjson (datetimes etc. fall back to str)"""
+    return orjson.dumps(obj, default=str).decode()
+
+# Max WebSocket sends in flight per broadcast
+_BROADCAST_CHUNK = 1024
+
 # Global instances
 vector_store = None
 retriever = None
 decision_engine = None
 action_registry = None
-financial_connector = None
+stream_manager = None
 
 class ConnectionManager:
     """Manage WebSocket connections"""
@@ -40,11 +49,19 @@ class ConnectionManager:
         await websocket.send_text(message)
         
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                self.disconnect(connection)
+        # Snapshot so clients (dis)connecting mid-broadcast don't affect this fan-out
+        connections = tuple(self.active_connections)
+        
+        # Send concurrently so one slow client doesn't stall the rest; chunked to bound in-flight sends
+        for i in range(0, len(connections), _BROADCAST_CHUNK):
+            chunk = connections[i:i + _BROADCAST_CHUNK]
+            results = await asyncio.gather(
+                *(connection.send_text(message) for connection in chunk),
+                return_exceptions=True
+            )
+            for connection, result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    self.disconnect(connection)
 
 manager = ConnectionManager()
 
@@ -54,7 +71,7 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Initializing Live Data RAG System...")
     
-    global vector_store, retriever, decision_engine, action_registry, financial_connector
+    global vector_store, retriever, decision_engine, action_registry, stream_manager
     
     # Initialize components
     vector_store = TimeAwareVectorStore()
@@ -63,10 +80,11 @@ async def lifespan(app: FastAPI):
     retriever = TimeAwareRetriever(vector_store)
     decision_engine = ActionDecisionEngine()
     action_registry = ActionRegistry()
-    financial_connector = FinancialDataConnector()
     
-    # Start data ingestion task
-    asyncio.create_task(data_ingestion_task())
+    # Start data ingestion; processed items are stored and broadcast by the stream manager
+    stream_manager = DataStreamManager()
+    await stream_manager.initialize(DataProcessor(vector_store), vector_store, on_data=broadcast_stream_data)
+    await stream_manager.start_all_streams({"financial": {"interval": 60}})
     
     logger.info("System initialized successfully")
     
@@ -75,8 +93,15 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Live Data RAG System...")
     
-    if financial_connector:
-        await financial_connector.close()
+    if stream_manager:
+        await stream_manager.cleanup()
+    
+    # Before the vector store, which in-flight search batches still use
+    if retriever:
+        await retriever.close()
+    
+    if vector_store:
+        await vector_store.close()
     
     logger.info("Shutdown complete")
 
@@ -102,12 +127,12 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             if message["type"] == "subscribe_stream":
                 # Handle stream subscription
                 await manager.send_personal_message(
-                    json.dumps({
+                    _json_text({
                         "type": "subscription_confirmation",
                         "stream_id": message["streamId"],
                         "status": "subscribed"
@@ -119,7 +144,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 # Process real-time query
                 response = await process_query(message["query"])
                 await manager.send_personal_message(
-                    json.dumps({
+                    _json_text({
                         "type": "query_response",
                         "query_id": message.get("queryId"),
                         "response": response
@@ -166,7 +191,7 @@ async def process_query_endpoint(query: Dict):
 async def get_action_history(limit: int = 20):
     """Get action history"""
     if action_registry:
-        return action_registry.action_history[-limit:]
+        return action_registry.recent_history(limit)
     return []
 
 @app.post("/api/v1/actions/confirm/{action_id}")
@@ -186,34 +211,16 @@ async def get_data_streams():
     ]
 
 # Background tasks
-async def data_ingestion_task():
-    """Continuous data ingestion task"""
-    while True:
-        try:
-            # Fetch financial data
-            if financial_connector:
-                quotes = await financial_connector.fetch_realtime_quotes()
-                
-                for quote in quotes:
-                    if quote:
-                        # Store in vector DB
-                        await vector_store.store_data(quote)
-                        
-                        # Broadcast to WebSocket clients
-                        await manager.broadcast(
-                            json.dumps({
-                                "type": "data_update",
-                                "data_type": "financial_quote",
-                                "data": quote
-                            })
-                        )
-            
-            # Sleep before next ingestion
-            await asyncio.sleep(60)  # Every minute
-            
-        except Exception as e:
-            logger.error(f"Data ingestion error: {e}")
-            await asyncio.sleep(10)
+async def broadcast_stream_data(stream_id: str, data: Dict):
+    """Forward processed stream data to WebSocket clients"""
+    await manager.broadcast(
+        _json_text({
+            "type": "data_update",
+            "data_type": data.get("original_data_type", data.get("data_type")),
+            "stream_id": stream_id,
+            "data": data
+        })
+    )
 
 async def process_query(query: str, context: Dict = None) -> Dict:
     """Process a query through the full pipeline"""
@@ -230,7 +237,7 @@ async def process_query(query: str, context: Dict = None) -> Dict:
         query=query,
         context=retrieval_result["context"],
         user_rules=user_rules,
-        historical_actions=action_registry.action_history[-10:] if action_registry else []
+        historical_actions=action_registry.recent_actions if action_registry else []
     )
     
     # 3. Execute action if needed
@@ -250,7 +257,7 @@ async def process_query(query: str, context: Dict = None) -> Dict:
         # Broadcast action execution
         if action_result:
             await manager.broadcast(
-                json.dumps({
+                _json_text({
                     "type": "action_executed",
                     "action": action_result
                 })
@@ -287,10 +294,25 @@ def generate_response(query: str, context: str, decision: Dict, action_result: D
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    
+    if settings.DEBUG:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        # uvloop + httptools (both in uvicorn[standard]); a single worker since
+        # each worker would run its own copy of the ingestion streams
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="uvloop",
+            http="httptools",
+            ws="websockets",
+            reload=False,
+            log_level="warning"
+        )
\ No newline at end of file
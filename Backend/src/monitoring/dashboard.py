@@ -1,7 +1,13 @@
 import asyncio
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Iterator, Tuple
 from datetime import datetime, timedelta
-import json
+import orjson
+import time
+import numpy as np
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Table, case, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.schema import CreateIndex
 from ...config.settings import settings
 from ...monitoring.logger import get_logger
 from ...database import SessionLocal
@@ -10,85 +16,250 @@ from ...models.system_metric import SystemMetric
 
 logger = get_logger(__name__)
 
+# Indexes backing the dashboard queries: every SystemMetric lookup filters by
+# metric_name and orders/bounds by timestamp; ActionLog is grouped by status and
+# type and listed newest first. Defining them on the model columns also attaches
+# them to the tables, so metadata.create_all() creates them on fresh databases;
+# existing databases get them from create_dashboard_schema() at deploy time.
+_DASHBOARD_INDEXES = (
+    Index("ix_system_metric_name_ts", SystemMetric.metric_name, SystemMetric.timestamp.desc()),
+    Index(
+        "ix_system_metric_alerts_ts",
+        SystemMetric.timestamp.desc(),
+        postgresql_where=SystemMetric.metric_name == "system_alert"
+    ),
+    Index("ix_action_log_status", ActionLog.status),
+    Index("ix_action_log_type", ActionLog.action_type),
+    Index("ix_action_log_timestamp_desc", ActionLog.timestamp.desc()),
+)
+
+# Health components as (metric name prefix, component, weight); a metric belongs
+# to a component when its name starts with the prefix (e.g. "api_latency" -> api_health)
+_HEALTH_COMPONENTS = (
+    ("api", "api_health", 0.3),
+    ("database", "database_health", 0.25),
+    ("processing", "processing_health", 0.25),
+    ("action", "action_health", 0.2),
+)
+
+# LIKE patterns for the component CASE, built once
+_HEALTH_PATTERNS = tuple((f"{prefix}%", component) for prefix, component, _ in _HEALTH_COMPONENTS)
+
+# Only samples this recent count toward a component's health average
+_HEALTH_WINDOW = timedelta(hours=1)
+
+# date_trunc unit for each chart interval
+_BUCKET_UNITS = {"1m": "minute", "1h": "hour", "1d": "day"}
+
+def _rollup_table(name: str) -> Table:
+    """Pre-aggregated SystemMetric buckets, one row per (metric, bucket)"""
+    return Table(
+        name,
+        SystemMetric.__table__.metadata,
+        Column("metric_name", String, primary_key=True),
+        Column("bucket_ts", DateTime, primary_key=True),
+        Column("sum", Float, nullable=False),
+        Column("count", Integer, nullable=False),
+        Column("min", Float, nullable=False),
+        Column("max", Float, nullable=False),
+    )
+
+# Rollup tables keyed by chart interval, as (table, bucket width, how far back an
+# empty table is first filled). The 1m interval (last hour) still reads raw rows.
+_ROLLUP_TABLES = {
+    "1h": (_rollup_table("system_metric_rollup_1h"), timedelta(hours=1), timedelta(hours=24)),
+    "1d": (_rollup_table("system_metric_rollup_1d"), timedelta(days=1), timedelta(days=7)),
+}
+
+# How long after its record time a sample may reach SystemMetric: the metrics
+# buffer flushes every 60 s, plus headroom for slow or retried flushes
+_ROLLUP_LAG = timedelta(minutes=5)
+
+def create_dashboard_schema(engine):
+    """Create the rollup tables and dashboard indexes on an existing database.
+    
+    A deploy-time step (scripts/create_dashboard_schema.py), never run by the
+    service itself. Indexes are built CONCURRENTLY so writes to the live tables,
+    the metrics COPY included, aren't blocked while they build; that can't run
+    inside a transaction, so the connection is in autocommit.
+    """
+    for table, _, _ in _ROLLUP_TABLES.values():
+        table.create(bind=engine, checkfirst=True)
+    
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index in _DASHBOARD_INDEXES:
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+            conn.exec_driver_sql(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+
 class DashboardService:
     """Dashboard service for system monitoring and visualization"""
     
     def __init__(self):
-        self.metrics_cache = {}
+        self.metrics_cache: OrderedDict = OrderedDict()
+        self.max_cache = 256
         self.cache_ttl = 30  # seconds
+        self.realtime_ttl = 5  # seconds
+        self._refresh_locks: Dict[str, asyncio.Lock] = {}
+        self._refresh_tasks = set()
         self.last_update = {}
+        self._rollup_watermarks: Dict[str, datetime] = {}
+        self._rollup_task: Optional[asyncio.Task] = None
+        self.rollup_interval = 60  # seconds
+        self._usage_samples: Dict[str, tuple] = {}
+        self.usage_sample_ttl = 1.0  # seconds
         
-    async def get_system_overview(self) -> Dict[str, Any]:
-        """Get system overview dashboard data"""
-        cache_key = "system_overview"
-        cached = self._get_cached(cache_key)
+        # Prime psutil's CPU counters so non-blocking reads have a baseline
+        try:
+            import psutil
+            psutil.cpu_percent(interval=None)
+        except ImportError:
+            pass
+    
+    def _ensure_rollup_refresh(self):
+        """Start the background rollup refresher on first use (or restart it if it died)"""
+        if self._rollup_task is None or self._rollup_task.done():
+            self._rollup_task = asyncio.create_task(self.start_periodic_rollups(self.rollup_interval))
+    
+    async def start_periodic_rollups(self, interval: int = 60):
+        """Refresh the rollup tables every `interval` seconds, off the request path"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self._refresh_rollups)
+            except Exception as e:
+                logger.error("Error refreshing dashboard rollups: %s", e)
+            await asyncio.sleep(interval)
+    
+    def _refresh_rollups(self):
+        """Re-aggregate raw SystemMetric rows into the rollup tables (runs on the default executor).
+        
+        Every bucket from one bucket plus _ROLLUP_LAG before the previous refresh
+        onwards is rebuilt from the raw rows and upserted, so samples that land
+        late in an already rolled-up bucket are still counted. A process's first
+        refresh resumes from the newest stored bucket instead of re-filling the
+        whole window.
+        """
+        now = datetime.utcnow()
         
-        if cached:
-            return cached
+        with SessionLocal() as db:
+            try:
+                for interval, (table, width, backfill) in _ROLLUP_TABLES.items():
+                    watermark = self._rollup_watermarks.get(interval)
+                    if watermark is None:
+                        watermark = db.query(func.max(table.c.bucket_ts)).scalar() or now - backfill
+                    since = watermark - width - _ROLLUP_LAG
+                    bucket = func.date_trunc(_BUCKET_UNITS[interval], SystemMetric.timestamp)
+                    
+                    source = db.query(
+                        SystemMetric.metric_name,
+                        bucket,
+                        func.sum(SystemMetric.metric_value),
+                        func.count(),
+                        func.min(SystemMetric.metric_value),
+                        func.max(SystemMetric.metric_value)
+                    ).filter(
+                        SystemMetric.timestamp >= func.date_trunc(_BUCKET_UNITS[interval], since)
+                    ).group_by(SystemMetric.metric_name, bucket)
+                    
+                    stmt = pg_insert(table).from_select(
+                        ["metric_name", "bucket_ts", "sum", "count", "min", "max"],
+                        source.statement
+                    )
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["metric_name", "bucket_ts"],
+                        set_={col: stmt.excluded[col] for col in ("sum", "count", "min", "max")}
+                    )
+                    db.execute(stmt)
+                
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
         
+        for interval in _ROLLUP_TABLES:
+            self._rollup_watermarks[interval] = now
+    
+    async def close(self):
+        """Stop the background rollup refresher"""
+        if self._rollup_task is not None:
+            self._rollup_task.cancel()
+            try:
+                await self._rollup_task
+            except asyncio.CancelledError:
+                pass
+            self._rollup_task = None
+    
+    async def get_system_overview(self) -> Dict[str, Any]:
+        """Get system overview dashboard data"""
+        # The 24h/7d charts read rollups kept current in the background
+        self._ensure_rollup_refresh()
         try:
-            db = SessionLocal()
-            
-            # Get recent metrics
-            recent_metrics = db.query(SystemMetric).order_by(
-                SystemMetric.timestamp.desc()
-            ).limit(100).all()
-            
-            # Get action statistics
+            return await self._get_swr("system_overview", self._build_system_overview)
+        except Exception as e:
+            logger.error("Error getting system overview: %s", e)
+            return {
+                "timestamp": datetime.utcnow().isoformat(),
+                "error": str(e),
+                "system_health": {"status": "unknown", "score": 0}
+            }
+    
+    async def _build_system_overview(self) -> Dict[str, Any]:
+        """Build the system overview from the database"""
+        # One session (one pooled connection) shared by every panel
+        with SessionLocal() as db:
+            # Scalar counters shared by the pipeline and performance sections
+            rollups = await self._get_scalar_rollups(db)
+            
+            # The panel helpers run sync queries on the one shared session, so
+            # they are awaited one after another; nothing here runs concurrently
             action_stats = await self._get_action_stats(db)
-            
-            # Get data pipeline status
-            pipeline_status = await self._get_pipeline_status(db)
-            
-            # Calculate system health
-            system_health = self._calculate_system_health(recent_metrics)
+            pipeline_status = await self._get_pipeline_status(db, rollups)
+            component_averages = await self._get_component_averages(db)
+            last_hour = await self._get_metrics_for_period(db, "1h")
+            last_24h = await self._get_metrics_for_period(db, "24h")
+            last_7d = await self._get_metrics_for_period(db, "7d")
+            alerts = await self._get_recent_alerts(db)
+            performance = await self._get_performance_metrics(db, rollups)
             
             # Compile dashboard data
             dashboard_data = {
                 "timestamp": datetime.utcnow().isoformat(),
-                "system_health": system_health,
+                "system_health": self._calculate_system_health(component_averages),
                 "metrics": {
-                    "last_hour": await self._get_metrics_for_period("1h"),
-                    "last_24h": await self._get_metrics_for_period("24h"),
-                    "last_7d": await self._get_metrics_for_period("7d")
+                    "last_hour": last_hour,
+                    "last_24h": last_24h,
+                    "last_7d": last_7d
                 },
                 "actions": action_stats,
                 "data_pipeline": pipeline_status,
-                "alerts": await self._get_recent_alerts(db),
-                "performance": await self._get_performance_metrics(db)
+                "alerts": alerts,
+                "performance": performance
             }
             
-            # Cache the result
-            self._set_cached(cache_key, dashboard_data)
-            
             return dashboard_data
-            
-        except Exception as e:
-            logger.error(f"Error getting system overview: {e}")
-            return {
-                "timestamp": datetime.utcnow().isoformat(),
-                "error": str(e),
-                "system_health": {"status": "unknown", "score": 0}
-            }
-        finally:
-            db.close()
     
     async def _get_action_stats(self, db) -> Dict[str, Any]:
         """Get action execution statistics"""
         # Get counts by status
         status_counts = db.query(
             ActionLog.status,
-            db.func.count(ActionLog.id)
+            func.count(ActionLog.id)
         ).group_by(ActionLog.status).all()
         
         # Get counts by type
         type_counts = db.query(
             ActionLog.action_type,
-            db.func.count(ActionLog.id)
+            func.count(ActionLog.id)
         ).group_by(ActionLog.action_type).all()
         
-        # Get recent actions
-        recent_actions = db.query(ActionLog).order_by(
+        # Get recent actions (plain rows; only these columns are read)
+        recent_actions = db.query(
+            ActionLog.id,
+            ActionLog.action_type,
+            ActionLog.status,
+            ActionLog.timestamp,
+            ActionLog.reason
+        ).order_by(
             ActionLog.timestamp.desc()
         ).limit(10).all()
         
@@ -118,10 +289,43 @@ class DashboardService:
             ]
         }
     
-    async def _get_pipeline_status(self, db) -> Dict[str, Any]:
+    async def _get_scalar_rollups(self, db) -> Dict[str, float]:
+        """Get every scalar counter the overview needs in one round-trip"""
+        now = datetime.utcnow()
+        one_min_ago = now - timedelta(minutes=1)
+        one_hour_ago = now - timedelta(hours=1)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        name = SystemMetric.metric_name
+        ts = SystemMetric.timestamp
+        value = SystemMetric.metric_value
+        
+        # Conditional aggregation over the widest window (today or the last
+        # hour, whichever starts earlier) so a single index scan serves all of them
+        row = db.query(
+            func.count(case(((name == "query_count") & (ts >= one_min_ago), 1))),
+            func.sum(case(((name == "processing_errors") & (ts >= one_hour_ago), value))),
+            func.sum(case(((name == "data_points_processed") & (ts >= one_hour_ago), value))),
+            func.sum(case(((name == "data_points_processed") & (ts >= today_start), value)))
+        ).filter(
+            name.in_(("query_count", "processing_errors", "data_points_processed")),
+            ts >= min(today_start, one_hour_ago)
+        ).one()
+        
+        queries_last_minute, errors_last_hour, processed_last_hour, processed_today = row
+        errors_last_hour = errors_last_hour or 0
+        processed_last_hour = processed_last_hour or 0
+        
+        return {
+            "queries_per_second": queries_last_minute or 0,
+            "error_rate": (errors_last_hour / processed_last_hour) * 100 if processed_last_hour > 0 else 0,
+            "data_points_today": processed_today or 0
+        }
+    
+    async def _get_pipeline_status(self, db, rollups: Dict[str, float]) -> Dict[str, Any]:
         """Get data pipeline status"""
         # Get recent data points
-        recent_data = db.query(SystemMetric).filter(
+        recent_data = db.query(SystemMetric.metric_value, SystemMetric.timestamp).filter(
             SystemMetric.metric_name == "data_points_processed"
         ).order_by(SystemMetric.timestamp.desc()).limit(10).all()
         
@@ -141,7 +345,7 @@ class DashboardService:
             throughput = 0
         
         # Get error rate
-        error_metrics = db.query(SystemMetric).filter(
+        error_metrics = db.query(SystemMetric.metric_value).filter(
             SystemMetric.metric_name == "processing_errors"
         ).order_by(SystemMetric.timestamp.desc()).limit(10).all()
         
@@ -150,11 +354,11 @@ class DashboardService:
         return {
             "throughput_per_second": round(throughput, 2),
             "total_errors": total_errors,
-            "data_points_today": await self._get_today_metric("data_points_processed"),
+            "data_points_today": rollups["data_points_today"],
             "active_streams": await self._get_active_streams_count()
         }
     
-    async def _get_metrics_for_period(self, period: str) -> Dict[str, Any]:
+    async def _get_metrics_for_period(self, db, period: str) -> Dict[str, Any]:
         """Get metrics for a specific time period"""
         # Define time ranges
         now = datetime.utcnow()
@@ -173,106 +377,93 @@ class DashboardService:
             interval = "1m"
         
         try:
-            db = SessionLocal()
-            
-            # Get metrics for the period
-            metrics = db.query(SystemMetric).filter(
-                SystemMetric.timestamp >= start_time
-            ).order_by(SystemMetric.timestamp).all()
-            
-            # Group by metric name and interval
-            grouped_metrics = {}
-            
-            for metric in metrics:
-                metric_name = metric.metric_name
-                if metric_name not in grouped_metrics:
-                    grouped_metrics[metric_name] = []
-                
-                grouped_metrics[metric_name].append({
-                    "timestamp": metric.timestamp.isoformat(),
-                    "value": metric.metric_value,
-                    "metadata": metric.metadata
-                })
+            if interval in _ROLLUP_TABLES:
+                # Hourly/daily charts read the pre-aggregated buckets
+                table = _ROLLUP_TABLES[interval][0]
+                rows = db.query(
+                    table.c.metric_name,
+                    table.c.bucket_ts,
+                    table.c.sum / table.c.count
+                ).filter(
+                    table.c.bucket_ts >= func.date_trunc(_BUCKET_UNITS[interval], start_time)
+                ).order_by(table.c.bucket_ts).all()
+            else:
+                # Average each metric per time bucket in the database; only one row
+                # per (metric, bucket) comes back instead of every raw sample
+                bucket = func.date_trunc(_BUCKET_UNITS[interval], SystemMetric.timestamp).label("bucket")
+                rows = db.query(
+                    SystemMetric.metric_name,
+                    bucket,
+                    func.avg(SystemMetric.metric_value)
+                ).filter(
+                    SystemMetric.timestamp >= start_time
+                ).group_by(
+                    SystemMetric.metric_name, bucket
+                ).order_by(bucket).all()
             
             # Process for charting
-            chart_data = {}
-            for metric_name, data_points in grouped_metrics.items():
-                # Aggregate by interval
-                if interval == "1m":
-                    chart_data[metric_name] = data_points[-60:]  # Last 60 minutes
-                elif interval == "1h":
-                    # Group by hour
-                    hourly_data = {}
-                    for point in data_points:
-                        hour_key = point["timestamp"][:13] + ":00:00"
-                        if hour_key not in hourly_data:
-                            hourly_data[hour_key] = []
-                        hourly_data[hour_key].append(point["value"])
-                    
-                    chart_data[metric_name] = [
-                        {
-                            "timestamp": hour,
-                            "value": sum(values) / len(values) if values else 0
-                        }
-                        for hour, values in hourly_data.items()
-                    ]
-                elif interval == "1d":
-                    # Group by day
-                    daily_data = {}
-                    for point in data_points:
-                        day_key = point["timestamp"][:10]
-                        if day_key not in daily_data:
-                            daily_data[day_key] = []
-                        daily_data[day_key].append(point["value"])
-                    
-                    chart_data[metric_name] = [
-                        {
-                            "timestamp": day + "T00:00:00",
-                            "value": sum(values) / len(values) if values else 0
-                        }
-                        for day, values in daily_data.items()
-                    ]
+            # Rows arrive ordered by bucket, so each bucket's metrics are adjacent:
+            # format a bucket once when it changes rather than hashing every row
+            chart_data = defaultdict(list)
+            last_bucket = iso = None
+            for metric_name, bucket_ts, avg_value in rows:
+                if bucket_ts != last_bucket:
+                    last_bucket, iso = bucket_ts, bucket_ts.isoformat()
+                chart_data[metric_name].append({
+                    "timestamp": iso,
+                    "value": float(avg_value) if avg_value is not None else 0
+                })
             
-            return chart_data
+            return dict(chart_data)
             
         except Exception as e:
-            logger.error(f"Error getting metrics for period {period}: {e}")
+            logger.error("Error getting metrics for period %s: %s", period, e)
+            # Clear the failed statement so the shared session stays usable
+            db.rollback()
             return {}
-        finally:
-            db.close()
     
-    def _calculate_system_health(self, metrics: List[SystemMetric]) -> Dict[str, Any]:
+    async def _get_component_averages(self, db) -> Dict[str, float]:
+        """Average of the last 5 values per health component within _HEALTH_WINDOW, computed in SQL"""
+        matches = [
+            (SystemMetric.metric_name.like(pattern), component)
+            for pattern, component in _HEALTH_PATTERNS
+        ]
+        component = case(*matches)
+        
+        # Rank each component's recent samples newest first, then average the top 5;
+        # the time bound keeps the window function off the table's full history
+        ranked = db.query(
+            component.label("component"),
+            SystemMetric.metric_value.label("value"),
+            func.row_number().over(
+                partition_by=component,
+                order_by=SystemMetric.timestamp.desc()
+            ).label("rn")
+        ).filter(
+            SystemMetric.timestamp >= datetime.utcnow() - _HEALTH_WINDOW,
+            or_(*(match for match, _ in matches))
+        ).subquery()
+        
+        rows = db.query(
+            ranked.c.component,
+            func.avg(ranked.c.value)
+        ).filter(ranked.c.rn <= 5).group_by(ranked.c.component).all()
+        
+        return {comp: float(avg) for comp, avg in rows if avg is not None}
+    
+    def _calculate_system_health(self, component_averages: Dict[str, float]) -> Dict[str, Any]:
         """Calculate overall system health score"""
-        if not metrics:
+        if not component_averages:
             return {"status": "unknown", "score": 0, "components": {}}
         
-        # Component weights
-        weights = {
-            "api_health": 0.3,
-            "database_health": 0.25,
-            "processing_health": 0.25,
-            "action_health": 0.2
-        }
-        
         component_scores = {}
         total_score = 0
         
         # Calculate component scores
-        for component, weight in weights.items():
-            # Get relevant metrics
-            component_metrics = [
-                m for m in metrics 
-                if m.metric_name.startswith(component.replace("_health", ""))
-            ]
-            
-            if component_metrics:
-                # Average the last 5 values
-                recent_values = [m.metric_value for m in component_metrics[-5:]]
-                avg_score = sum(recent_values) / len(recent_values)
-                component_scores[component] = avg_score
-                total_score += avg_score * weight
-            else:
-                component_scores[component] = 0
+        for _, component, weight in _HEALTH_COMPONENTS:
+            avg_score = component_averages.get(component, 0)
+            component_scores[component] = avg_score
+            total_score += avg_score * weight
         
         # Determine status
         if total_score >= 0.9:
@@ -293,37 +484,45 @@ class DashboardService:
     
     async def _get_recent_alerts(self, db) -> List[Dict[str, Any]]:
         """Get recent system alerts"""
-        # Get alert metrics
-        alerts = db.query(SystemMetric).filter(
+        # Project just the alert fields out of the JSONB metadata server-side
+        alerts = db.query(
+            SystemMetric.timestamp,
+            SystemMetric.metadata["level"].astext,
+            SystemMetric.metadata["message"].astext,
+            SystemMetric.metadata["component"].astext
+        ).filter(
             SystemMetric.metric_name == "system_alert"
         ).order_by(SystemMetric.timestamp.desc()).limit(20).all()
         
         return [
             {
-                "level": metric.metadata.get("level", "info"),
-                "message": metric.metadata.get("message", ""),
-                "timestamp": metric.timestamp.isoformat(),
-                "component": metric.metadata.get("component", "unknown")
+                "level": level or "info",
+                "message": message or "",
+                "timestamp": timestamp.isoformat(),
+                "component": component or "unknown"
             }
-            for metric in alerts
+            for timestamp, level, message, component in alerts
         ]
     
-    async def _get_performance_metrics(self, db) -> Dict[str, Any]:
+    async def _get_performance_metrics(self, db, rollups: Dict[str, float]) -> Dict[str, Any]:
         """Get performance metrics"""
         # Get response time metrics
-        response_times = db.query(SystemMetric).filter(
+        response_times = db.query(SystemMetric.metric_value).filter(
             SystemMetric.metric_name == "response_time_ms"
         ).order_by(SystemMetric.timestamp.desc()).limit(100).all()
         
         if response_times:
-            avg_response_time = sum(
-                m.metric_value for m in response_times
-            ) / len(response_times)
-            
-            # Get percentiles
-            values = sorted([m.metric_value for m in response_times])
-            p95 = values[int(len(values) * 0.95)] if len(values) > 0 else 0
-            p99 = values[int(len(values) * 0.99)] if len(values) > 0 else 0
+            values = np.fromiter(
+                (m.metric_value for m in response_times), dtype=np.float64, count=len(response_times)
+            )
+            avg_response_time = float(values.mean())
+            
+            # Get percentiles; partition selects both order statistics in O(n) without a full sort
+            k95 = int(len(values) * 0.95)
+            k99 = int(len(values) * 0.99)
+            selected = np.partition(values, (k95, k99))
+            p95 = float(selected[k95])
+            p99 = float(selected[k99])
         else:
             avg_response_time = 0
             p95 = 0
@@ -333,125 +532,107 @@ class DashboardService:
             "avg_response_time_ms": round(avg_response_time, 2),
             "p95_response_time_ms": round(p95, 2),
             "p99_response_time_ms": round(p99, 2),
-            "queries_per_second": await self._get_qps(),
-            "error_rate": await self._get_error_rate()
+            "queries_per_second": rollups["queries_per_second"],
+            "error_rate": rollups["error_rate"]
         }
     
-    async def _get_today_metric(self, metric_name: str) -> float:
-        """Get today's total for a metric"""
-        try:
-            db = SessionLocal()
-            
-            today_start = datetime.utcnow().replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            
-            result = db.query(db.func.sum(SystemMetric.metric_value)).filter(
-                SystemMetric.metric_name == metric_name,
-                SystemMetric.timestamp >= today_start
-            ).scalar()
-            
-            return result or 0
-            
-        except Exception as e:
-            logger.error(f"Error getting today metric {metric_name}: {e}")
-            return 0
-        finally:
-            db.close()
-    
     async def _get_active_streams_count(self) -> int:
         """Get count of active data streams"""
         # This would query your stream manager
         # For now, return mock value
         return 3
     
-    async def _get_qps(self) -> float:
-        """Get queries per second"""
-        try:
-            db = SessionLocal()
-            
-            # Get query count from last minute
-            one_min_ago = datetime.utcnow() - timedelta(minutes=1)
-            
-            count = db.query(db.func.count(SystemMetric.id)).filter(
-                SystemMetric.metric_name == "query_count",
-                SystemMetric.timestamp >= one_min_ago
-            ).scalar()
-            
-            return count or 0
-            
-        except Exception as e:
-            logger.error(f"Error getting QPS: {e}")
-            return 0
-        finally:
-            db.close()
+    async def _get_swr(self, key: str, factory: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """Stale-while-revalidate lookup.
+        
+        Fresh entries are returned as-is. Entries past their TTL but within the
+        stale window are returned immediately while a single background task
+        rebuilds them. Missing or expired entries are built inline, with
+        concurrent callers waiting on the same rebuild.
+        """
+        ttl = self.cache_ttl if ttl is None else ttl
+        entry = self._get_cached(key)
+        
+        if entry is not None:
+            data, fresh = entry
+            if not fresh and not self._refresh_lock(key).locked():
+                task = asyncio.create_task(self._refresh_in_background(key, factory, ttl))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            return data
+        
+        return await self._refresh(key, factory, ttl)
+    
+    def _refresh_lock(self, key: str) -> asyncio.Lock:
+        """Per-key lock so only one rebuild runs at a time"""
+        lock = self._refresh_locks.get(key)
+        if lock is None:
+            lock = self._refresh_locks[key] = asyncio.Lock()
+        return lock
     
-    async def _get_error_rate(self) -> float:
-        """Get error rate percentage"""
+    async def _refresh(self, key: str, factory: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """Rebuild a cache entry unless another caller already refreshed it"""
+        async with self._refresh_lock(key):
+            entry = self._get_cached(key)
+            if entry is not None and entry[1]:
+                return entry[0]
+            
+            data = await factory()
+            self._set_cached(key, data, ttl)
+            return data
+    
+    async def _refresh_in_background(self, key: str, factory: Callable[[], Awaitable[Any]], ttl: float):
+        """Background rebuild; on failure the stale entry keeps being served"""
         try:
-            db = SessionLocal()
-            
-            # Get error count from last hour
-            one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-            
-            error_count = db.query(db.func.sum(SystemMetric.metric_value)).filter(
-                SystemMetric.metric_name == "processing_errors",
-                SystemMetric.timestamp >= one_hour_ago
-            ).scalar() or 0
-            
-            total_operations = db.query(db.func.sum(SystemMetric.metric_value)).filter(
-                SystemMetric.metric_name == "data_points_processed",
-                SystemMetric.timestamp >= one_hour_ago
-            ).scalar() or 0
-            
-            if total_operations > 0:
-                return (error_count / total_operations) * 100
-            else:
-                return 0
-            
+            await self._refresh(key, factory, ttl)
         except Exception as e:
-            logger.error(f"Error getting error rate: {e}")
-            return 0
-        finally:
-            db.close()
-    
-    def _get_cached(self, key: str) -> Optional[Any]:
-        """Get cached data"""
-        if key in self.metrics_cache:
-            data, timestamp = self.metrics_cache[key]
-            if datetime.utcnow() - timestamp < timedelta(seconds=self.cache_ttl):
-                return data
+            logger.error("Error refreshing dashboard cache %s: %s", key, e)
+    
+    def _get_cached(self, key: str) -> Optional[tuple]:
+        """Get (data, is_fresh) for a cached entry that is still within its stale window"""
+        entry = self.metrics_cache.get(key)
+        if entry is not None:
+            data, fresh_until, stale_until = entry
+            now = time.monotonic()
+            if now < stale_until:
+                self.metrics_cache.move_to_end(key)
+                return data, now < fresh_until
+            del self.metrics_cache[key]
         return None
     
-    def _set_cached(self, key: str, data: Any):
-        """Set cached data"""
-        self.metrics_cache[key] = (data, datetime.utcnow())
+    def _set_cached(self, key: str, data: Any, ttl: Optional[float] = None):
+        """Set cached data; it is fresh for ttl seconds and may be served stale for as long again"""
+        ttl = self.cache_ttl if ttl is None else ttl
+        now = time.monotonic()
+        self.metrics_cache[key] = (data, now + ttl, now + ttl * 2)
+        self.metrics_cache.move_to_end(key)
         
-        # Clean old cache entries
-        self._clean_cache()
-    
-    def _clean_cache(self):
-        """Clean old cache entries"""
-        cutoff = datetime.utcnow() - timedelta(seconds=self.cache_ttl * 2)
-        
-        to_remove = []
-        for key, (_, timestamp) in self.metrics_cache.items():
-            if timestamp < cutoff:
-                to_remove.append(key)
-        
-        for key in to_remove:
-            del self.metrics_cache[key]
+        # Evict least recently used entries; expired ones are dropped on lookup
+        while len(self.metrics_cache) > self.max_cache:
+            self.metrics_cache.popitem(last=False)
     
     async def get_real_time_updates(self) -> Dict[str, Any]:
         """Get real-time updates for dashboard"""
+        return await self._get_swr("real_time_updates", self._build_real_time_updates, ttl=self.realtime_ttl)
+    
+    async def _build_real_time_updates(self) -> Dict[str, Any]:
+        """Collect the real-time dashboard snapshot"""
+        health, alerts, cpu, memory, disk = await asyncio.gather(
+            self._get_current_health(),
+            self._get_active_alerts(),
+            self._get_cpu_usage(),
+            self._get_memory_usage(),
+            self._get_disk_usage()
+        )
+        
         return {
             "timestamp": datetime.utcnow().isoformat(),
-            "system_health": await self._get_current_health(),
-            "active_alerts": await self._get_active_alerts(),
+            "system_health": health,
+            "active_alerts": alerts,
             "performance": {
-                "cpu_usage": await self._get_cpu_usage(),
-                "memory_usage": await self._get_memory_usage(),
-                "disk_usage": await self._get_disk_usage()
+                "cpu_usage": cpu,
+                "memory_usage": memory,
+                "disk_usage": disk
             }
         }
     
@@ -475,27 +656,38 @@ class DashboardService:
         # Mock implementation
         return []
     
+    def _sample_usage(self, name: str, probe: Callable[[], float]) -> float:
+        """Return a recent reading of `probe`, re-sampling at most once per usage_sample_ttl"""
+        now = time.monotonic()
+        sample = self._usage_samples.get(name)
+        if sample is not None and now - sample[1] < self.usage_sample_ttl:
+            return sample[0]
+        
+        value = probe()
+        self._usage_samples[name] = (value, now)
+        return value
+    
     async def _get_cpu_usage(self) -> float:
-        """Get CPU usage percentage"""
+        """Get CPU usage percentage since the previous sample (non-blocking)"""
         import psutil
-        return psutil.cpu_percent(interval=1)
+        return self._sample_usage("cpu", lambda: psutil.cpu_percent(interval=None))
     
     async def _get_memory_usage(self) -> float:
         """Get memory usage percentage"""
         import psutil
-        return psutil.virtual_memory().percent
+        return self._sample_usage("memory", lambda: psutil.virtual_memory().percent)
     
     async def _get_disk_usage(self) -> float:
         """Get disk usage percentage"""
         import psutil
-        return psutil.disk_usage('/').percent
+        return self._sample_usage("disk", lambda: psutil.disk_usage('/').percent)
     
     async def export_dashboard_data(self, format: str = "json") -> Any:
         """Export dashboard data in specified format"""
         data = await self.get_system_overview()
         
         if format == "json":
-            return json.dumps(data, indent=2)
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
         elif format == "csv":
             # Convert to CSV format (simplified)
             import io
@@ -507,33 +699,35 @@ class DashboardService:
             # Write headers
             writer.writerow(["Metric", "Value", "Timestamp"])
             
-            # Flatten data
-            flat_data = self._flatten_dict(data)
-            for key, value in flat_data.items():
-                if isinstance(value, (str, int, float, bool)):
-                    writer.writerow([key, value, datetime.utcnow().isoformat()])
+            # Flatten data straight into the writer
+            exported_at = datetime.utcnow().isoformat()
+            writer.writerows(
+                (key, value, exported_at)
+                for key, value in self._iter_flat(data)
+                if isinstance(value, (str, int, float, bool))
+            )
             
             return output.getvalue()
         else:
             raise ValueError(f"Unsupported format: {format}")
     
-    def _flatten_dict(self, d: Dict[str, Any], parent_key: str = "") -> Dict[str, Any]:
-        """Flatten nested dictionary"""
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}.{k}" if parent_key else k
-            
-            if isinstance(v, dict):
-                items.extend(self._flatten_dict(v, new_key).items())
-            elif isinstance(v, list):
-                for i, item in enumerate(v):
-                    if isinstance(item, dict):
-                        items.extend(
-                            self._flatten_dict(item, f"{new_key}[{i}]").items()
-                        )
-                    else:
-                        items.append((f"{new_key}[{i}]", item))
+    def _iter_flat(self, d: Dict[str, Any], parent_key: str = "") -> Iterator[Tuple[str, Any]]:
+        """Yield (dotted_key, value) leaves of a nested dict in document order"""
+        # Explicit stack instead of recursion; children are pushed reversed so
+        # they pop in their original order. Non-dict list items are leaves.
+        stack = [(parent_key, d, False)]
+        while stack:
+            key, value, leaf = stack.pop()
+            if leaf:
+                yield key, value
+            elif isinstance(value, dict):
+                stack.extend(
+                    (f"{key}.{k}" if key else k, v, False) for k, v in reversed(value.items())
+                )
+            elif isinstance(value, list):
+                stack.extend(
+                    (f"{key}[{i}]", item, not isinstance(item, dict))
+                    for i, item in reversed(list(enumerate(value)))
+                )
             else:
-                items.append((new_key, v))
-        
-        return dict(items)
\ No newline at end of file
+                yield key, value
\ No newline at end of file
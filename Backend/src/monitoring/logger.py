@@ -1,12 +1,30 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
-import json
+import orjson
 from datetime import datetime
 from typing import Dict, Any, Optional
 from ...config.settings import settings
 
+# Background listener that owns the real (blocking) handlers
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+def _stop_queue_listener():
+    """Flush queued records and stop the listener thread"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
 def setup_logging():
-    """Setup logging configuration"""
+    """Setup logging configuration.
+    
+    Log calls only push onto a queue; a QueueListener thread does the console
+    and file writes so they never block the event loop.
+    """
+    global _queue_listener
     
     # Create formatter
     formatter = logging.Formatter(
@@ -28,9 +46,14 @@ def setup_logging():
     # Remove existing handlers
     root_logger.handlers.clear()
     
-    # Add handlers
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    # Route records through a queue to the real handlers
+    _stop_queue_listener()
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
     
     # Set levels for specific loggers
     logging.getLogger('uvicorn').setLevel(logging.WARNING)
@@ -60,7 +83,7 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, 'extra'):
             log_data.update(record.extra)
         
-        return json.dumps(log_data)
+        return orjson.dumps(log_data, default=str).decode()
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -83,36 +106,38 @@ class StructuredLogger:
         """Clear logging context"""
         self.context.clear()
     
+    def _log(self, level: int, message: str, kwargs: Dict[str, Any], **log_kwargs):
+        """Emit with merged context; skipped entirely when the level is disabled"""
+        if not self.logger.isEnabledFor(level):
+            return
+        extra = {**self.context, **kwargs} if self.context else kwargs
+        self.logger.log(level, message, extra={'extra': extra}, stacklevel=3, **log_kwargs)
+    
     def info(self, message: str, **kwargs):
         """Log info message with context"""
-        extra = {**self.context, **kwargs}
-        self.logger.info(message, extra={'extra': extra})
+        self._log(logging.INFO, message, kwargs)
     
     def warning(self, message: str, **kwargs):
         """Log warning message with context"""
-        extra = {**self.context, **kwargs}
-        self.logger.warning(message, extra={'extra': extra})
+        self._log(logging.WARNING, message, kwargs)
     
     def error(self, message: str, **kwargs):
         """Log error message with context"""
-        extra = {**self.context, **kwargs}
-        self.logger.error(message, extra={'extra': extra})
+        self._log(logging.ERROR, message, kwargs)
     
     def critical(self, message: str, **kwargs):
         """Log critical message with context"""
-        extra = {**self.context, **kwargs}
-        self.logger.critical(message, extra={'extra': extra})
+        self._log(logging.CRITICAL, message, kwargs)
     
     def debug(self, message: str, **kwargs):
         """Log debug message with context"""
-        extra = {**self.context, **kwargs}
-        self.logger.debug(message, extra={'extra': extra})
+        self._log(logging.DEBUG, message, kwargs)
     
     def exception(self, message: str, exc_info: Exception, **kwargs):
         """Log exception with context"""
-        extra = {**self.context, **kwargs}
-        self.logger.exception(message, exc_info=exc_info, extra={'extra': extra})
+        self._log(logging.ERROR, message, kwargs, exc_info=exc_info)
 
 
 # Initialize logging on module import
-setup_logging()
\ No newline at end of file
+setup_logging()
+atexit.register(_stop_queue_listener)
\ No newline at end of file
@@ -1,8 +1,17 @@
+import csv
+import io
 import time
-from typing import Dict, Any, List, Optional, Callable
+from array import array
+from typing import Dict, Any, Iterator, List, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from functools import lru_cache
 import asyncio
+import orjson
+import queue
+import threading
+from sqlalchemy import func
 from prometheus_client import Counter, Gauge, Histogram, Summary, generate_latest
 from ...config.settings import settings
 from ...monitoring.logger import get_logger
@@ -11,9 +20,83 @@ from ...models.system_metric import SystemMetric
 
 logger = get_logger(__name__)
 
+# Shared (never mutated) metadata for create_timer samples
+_TIMER_META = {"success": {"status": "success"}, "error": {"status": "error"}}
+
+# get_metric_summary cache lifetime per time range (seconds)
+_SUMMARY_TTLS = {"1h": 15, "24h": 60, "7d": 300}
+
+# Prometheus label values are limited to these sets (anything else is reported
+# as "other") so request-derived strings can't create unbounded time series
+_ALLOWED_STATUSES = frozenset({
+    "success", "error", "timeout",
+    "executed", "failed", "blocked", "rate_limited", "requires_confirmation"
+})
+_ALLOWED_QUERY_TYPES = frozenset({"analysis", "alert", "summary", "explanation"})
+_ALLOWED_ACTION_TYPES = frozenset({"alert", "api_call", "data_update", "workflow_trigger"})
+_ALLOWED_ERROR_TYPES = frozenset({
+    "llm_error", "TimeoutError", "ValueError", "KeyError", "ConnectionError", "RuntimeError"
+})
+_ALLOWED_COMPONENTS = frozenset({
+    "response_generator", "retriever", "action_registry", "data_pipeline", "metrics", "api"
+})
+
+def _label(value: str, allowed: frozenset) -> str:
+    """Map a label value outside `allowed` to "other" """
+    return value if value in allowed else "other"
+
+class _MetricColumns:
+    """Bounded struct-of-arrays buffer of pending metric samples"""
+    
+    __slots__ = ("names", "values", "timestamps", "metadata", "capacity")
+    
+    def __init__(self, capacity: int):
+        self.names: List[str] = []
+        self.values = array('d')
+        self.timestamps = array('d')  # epoch seconds (time.time())
+        self.metadata: List[Optional[Dict[str, Any]]] = []
+        self.capacity = capacity
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def append(self, name: str, value: float, metadata: Optional[Dict[str, Any]] = None):
+        """Add a sample; when full, the oldest quarter is dropped in one go"""
+        if len(self.names) >= self.capacity:
+            self._drop(max(1, self.capacity // 4))
+        
+        self.names.append(name)
+        self.values.append(value)
+        self.timestamps.append(time.time())
+        self.metadata.append(metadata)
+    
+    def take(self, n: int) -> tuple:
+        """Remove and return the oldest n samples as (names, values, timestamps, metadata)"""
+        batch = (self.names[:n], self.values[:n], self.timestamps[:n], self.metadata[:n])
+        self._drop(n)
+        return batch
+    
+    def restore(self, batch: tuple):
+        """Put a batch returned by take() back at the front"""
+        names, values, timestamps, metadata = batch
+        self.names[:0] = names
+        self.values[:0] = values
+        self.timestamps[:0] = timestamps
+        self.metadata[:0] = metadata
+    
+    def _drop(self, n: int):
+        del self.names[:n]
+        del self.values[:n]
+        del self.timestamps[:n]
+        del self.metadata[:n]
+
+
 class MetricsCollector:
     """Metrics collector for system monitoring"""
     
+    # Max rows per INSERT when draining the buffer
+    FLUSH_BATCH = 5000
+    
     def __init__(self):
         # Prometheus metrics
         self.query_counter = Counter(
@@ -61,108 +144,127 @@ class MetricsCollector:
             'Memory usage in bytes'
         )
         
-        # Internal metrics storage
-        self.metrics_buffer = []
+        # Internal metrics storage; bounded so a stalled database can't grow it
+        # without limit (the oldest samples are dropped first)
         self.buffer_size = 100
-        self.last_flush = datetime.utcnow()
+        self.metrics_buffer = _MetricColumns(self.buffer_size * 8)
+        self._flush_event = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.last_flush = time.time()  # epoch seconds
         self.flush_interval = 60  # seconds
         
-        # Statistics
-        self.stats = defaultdict(lambda: defaultdict(int))
+        # Statistics, flat and keyed "<group>.<name>" (e.g. "queries.total")
+        self.stats = TallyCounter()
+        
+        # Summaries keyed by (metric_name, time_range, ttl bucket); entries expire
+        # by the bucket rolling over rather than by explicit invalidation
+        self._cached_summary = lru_cache(maxsize=512)(self._compute_metric_summary)
+        
+        # Prometheus updates are queued as (metric, label_values, op, amount) and
+        # applied by a background thread, keeping client locks off the hot path
+        self._prom_queue = queue.SimpleQueue()
+        self._label_cache: Dict[tuple, Any] = {}
+        self._prom_thread = threading.Thread(
+            target=self._apply_prometheus_updates, name="metrics-prometheus", daemon=True
+        )
+        self._prom_thread.start()
         
     def record_query(self, query_type: str, status: str, duration: float):
         """Record a query"""
-        self.query_counter.labels(status=status, type=query_type).inc()
-        
-        self.response_time.observe(duration)
+        self._prom_queue.put_nowait((
+            self.query_counter,
+            (_label(status, _ALLOWED_STATUSES), _label(query_type, _ALLOWED_QUERY_TYPES)),
+            "inc", 1
+        ))
+        self._prom_queue.put_nowait((self.response_time, None, "observe", duration))
         
         # Store in buffer
-        self.metrics_buffer.append({
-            "metric_name": "query",
-            "metric_value": 1,
-            "metadata": {
-                "type": query_type,
-                "status": status,
-                "duration": duration
-            },
-            "timestamp": datetime.utcnow()
+        self.metrics_buffer.append("query", 1, {
+            "type": query_type,
+            "status": status,
+            "duration": duration
         })
         
         # Update stats
-        self.stats["queries"]["total"] += 1
-        self.stats["queries"][f"status_{status}"] += 1
-        self.stats["queries"][f"type_{query_type}"] += 1
+        self.stats["queries.total"] += 1
+        self.stats[f"queries.status_{status}"] += 1
+        self.stats[f"queries.type_{query_type}"] += 1
         
         self._check_flush()
     
     def record_action(self, action_type: str, status: str):
         """Record an action"""
-        self.action_counter.labels(action_type=action_type, status=status).inc()
-        
-        self.metrics_buffer.append({
-            "metric_name": "action",
-            "metric_value": 1,
-            "metadata": {
-                "action_type": action_type,
-                "status": status
-            },
-            "timestamp": datetime.utcnow()
+        self._prom_queue.put_nowait((
+            self.action_counter,
+            (_label(action_type, _ALLOWED_ACTION_TYPES), _label(status, _ALLOWED_STATUSES)),
+            "inc", 1
+        ))
+        
+        self.metrics_buffer.append("action", 1, {
+            "action_type": action_type,
+            "status": status
         })
         
-        self.stats["actions"]["total"] += 1
-        self.stats["actions"][f"type_{action_type}"] += 1
-        self.stats["actions"][f"status_{status}"] += 1
+        self.stats["actions.total"] += 1
+        self.stats[f"actions.type_{action_type}"] += 1
+        self.stats[f"actions.status_{status}"] += 1
         
         self._check_flush()
     
     def record_data_point(self, data_type: str, count: int = 1):
         """Record data points"""
-        self.data_points_counter.labels(data_type=data_type).inc(count)
-        
-        self.metrics_buffer.append({
-            "metric_name": "data_points_processed",
-            "metric_value": count,
-            "metadata": {
-                "data_type": data_type
-            },
-            "timestamp": datetime.utcnow()
-        })
+        self._prom_queue.put_nowait((self.data_points_counter, (data_type,), "inc", count))
+        
+        self.metrics_buffer.append("data_points_processed", count, {"data_type": data_type})
         
-        self.stats["data_points"]["total"] += count
-        self.stats["data_points"][f"type_{data_type}"] += count
+        self.stats["data_points.total"] += count
+        self.stats[f"data_points.type_{data_type}"] += count
         
         self._check_flush()
     
     def record_error(self, error_type: str, component: str, message: str = ""):
         """Record an error"""
-        self.error_counter.labels(error_type=error_type, component=component).inc()
-        
-        self.metrics_buffer.append({
-            "metric_name": "error",
-            "metric_value": 1,
-            "metadata": {
-                "error_type": error_type,
-                "component": component,
-                "message": message[:200]  # Truncate long messages
-            },
-            "timestamp": datetime.utcnow()
+        self._prom_queue.put_nowait((
+            self.error_counter,
+            (_label(error_type, _ALLOWED_ERROR_TYPES), _label(component, _ALLOWED_COMPONENTS)),
+            "inc", 1
+        ))
+        
+        self.metrics_buffer.append("error", 1, {
+            "error_type": error_type,
+            "component": component,
+            "message": message[:200]  # Truncate long messages
         })
         
-        self.stats["errors"]["total"] += 1
-        self.stats["errors"][f"type_{error_type}"] += 1
-        self.stats["errors"][f"component_{component}"] += 1
+        self.stats["errors.total"] += 1
+        self.stats[f"errors.type_{error_type}"] += 1
+        self.stats[f"errors.component_{component}"] += 1
         
         self._check_flush()
     
+    def _apply_prometheus_updates(self):
+        """Background thread: apply queued counter/histogram updates in order"""
+        while True:
+            metric, label_values, op, amount = self._prom_queue.get()
+            try:
+                target = self._child(metric, label_values) if label_values else metric
+                getattr(target, op)(amount)
+            except Exception as e:
+                logger.error(f"Failed to update Prometheus metric: {e}")
+    
+    def _child(self, metric, label_values: tuple):
+        """Memoized metric.labels(*label_values), skipping prometheus_client's per-call label lookup"""
+        key = (metric, label_values)
+        child = self._label_cache.get(key)
+        if child is None:
+            child = self._label_cache[key] = metric.labels(*label_values)
+        return child
+    
     def set_active_streams(self, count: int):
         """Set number of active streams"""
         self.active_streams.set(count)
         
-        self.metrics_buffer.append({
-            "metric_name": "active_streams",
-            "metric_value": count,
-            "timestamp": datetime.utcnow()
-        })
+        self.metrics_buffer.append("active_streams", count)
         
         self._check_flush()
     
@@ -170,11 +272,7 @@ class MetricsCollector:
         """Set system health score"""
         self.system_health.set(score)
         
-        self.metrics_buffer.append({
-            "metric_name": "system_health",
-            "metric_value": score,
-            "timestamp": datetime.utcnow()
-        })
+        self.metrics_buffer.append("system_health", score)
         
         self._check_flush()
     
@@ -182,67 +280,105 @@ class MetricsCollector:
         """Set memory usage"""
         self.memory_usage.set(bytes_used)
         
-        self.metrics_buffer.append({
-            "metric_name": "memory_usage_bytes",
-            "metric_value": bytes_used,
-            "timestamp": datetime.utcnow()
-        })
+        self.metrics_buffer.append("memory_usage_bytes", bytes_used)
         
         self._check_flush()
     
     def record_custom_metric(self, name: str, value: float, metadata: Dict[str, Any] = None):
         """Record a custom metric"""
-        self.metrics_buffer.append({
-            "metric_name": name,
-            "metric_value": value,
-            "metadata": metadata or {},
-            "timestamp": datetime.utcnow()
-        })
+        self.metrics_buffer.append(name, value, metadata)
         
         self._check_flush()
     
     def _check_flush(self):
-        """Check if metrics should be flushed to database"""
-        now = datetime.utcnow()
-        
-        if (len(self.metrics_buffer) >= self.buffer_size or 
-            (now - self.last_flush).total_seconds() >= self.flush_interval):
-            asyncio.create_task(self._flush_metrics())
+        """Wake the flusher once the buffer reaches buffer_size"""
+        if self._flush_task is None:
+            try:
+                self._flush_task = asyncio.create_task(self.start_periodic_flush(self.flush_interval))
+            except RuntimeError:
+                # No running loop yet; samples wait for the next call that has one
+                return
+        
+        # Interval-based flushes come from the flusher's own timeout
+        if len(self.metrics_buffer) >= self.buffer_size:
+            self._flush_event.set()
     
     async def _flush_metrics(self):
         """Flush metrics to database"""
         if not self.metrics_buffer:
             return
         
+        # Batches are taken from the buffer on the loop; CSV building and the
+        # blocking COPY/commit run on the default executor
+        loop = asyncio.get_running_loop()
+        db = SessionLocal()
+        flushed = 0
         try:
-            db = SessionLocal()
-            
-            # Convert buffer to database models
-            metrics_to_save = []
-            for metric_data in self.metrics_buffer:
-                metric = SystemMetric(
-                    metric_name=metric_data["metric_name"],
-                    metric_value=metric_data["metric_value"],
-                    metadata=metric_data.get("metadata", {}),
-                    timestamp=metric_data["timestamp"]
-                )
-                metrics_to_save.append(metric)
-            
-            # Bulk insert
-            db.bulk_save_objects(metrics_to_save)
-            db.commit()
-            
-            logger.info(f"Flushed {len(metrics_to_save)} metrics to database")
+            # Drain in large batches, each streamed with a single COPY
+            while self.metrics_buffer:
+                batch = self.metrics_buffer.take(self.FLUSH_BATCH)
+                
+                try:
+                    await loop.run_in_executor(None, self._write_batch, db, batch)
+                except Exception:
+                    # Keep metrics in buffer for retry
+                    self.metrics_buffer.restore(batch)
+                    raise
+                
+                flushed += len(batch[0])
             
-            # Clear buffer
-            self.metrics_buffer.clear()
-            self.last_flush = datetime.utcnow()
+            logger.info(f"Flushed {flushed} metrics to database")
+            self.last_flush = time.time()
             
         except Exception as e:
             logger.error(f"Failed to flush metrics: {e}")
-            # Keep metrics in buffer for retry
         finally:
-            db.close()
+            await loop.run_in_executor(None, db.close)
+    
+    def _write_batch(self, db, batch: tuple):
+        """COPY one batch and commit it, rolling back on failure (runs off the event loop)"""
+        try:
+            self._copy_batch(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    
+    def _copy_batch(self, db, batch: tuple):
+        """Write a take() batch with COPY FROM STDIN, or a multi-row INSERT if the driver can't COPY"""
+        names, values, timestamps, metadata = batch
+        cursor = db.connection().connection.cursor()
+        
+        if not hasattr(cursor, "copy_expert"):
+            cursor.close()
+            db.execute(SystemMetric.__table__.insert(), [
+                {
+                    "metric_name": name,
+                    "metric_value": value,
+                    "metadata": meta or {},
+                    "timestamp": datetime.utcfromtimestamp(ts)
+                }
+                for name, value, ts, meta in zip(names, values, timestamps, metadata)
+            ])
+            return
+        
+        # CSV straight from the columns; metadata is serialized once with orjson
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerows(
+            (name, value, orjson.dumps(meta or {}).decode(), datetime.utcfromtimestamp(ts).isoformat())
+            for name, value, ts, meta in zip(names, values, timestamps, metadata)
+        )
+        buf.seek(0)
+        
+        try:
+            cursor.copy_expert(
+                f"COPY {SystemMetric.__tablename__} (metric_name, metric_value, metadata, timestamp) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buf
+            )
+        finally:
+            cursor.close()
     
     def get_prometheus_metrics(self) -> bytes:
         """Get Prometheus metrics in text format"""
@@ -250,23 +386,31 @@ class MetricsCollector:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get current statistics"""
-        stats = dict(self.stats)
-        
-        # Add timestamp
-        stats["timestamp"] = datetime.utcnow().isoformat()
-        
-        # Add buffer info
-        stats["metrics_buffer_size"] = len(self.metrics_buffer)
-        stats["last_flush"] = self.last_flush.isoformat()
-        
-        return stats
+        return {
+            **self.stats,
+            "timestamp": datetime.utcnow().isoformat(),
+            "metrics_buffer_size": len(self.metrics_buffer),
+            "last_flush": datetime.utcfromtimestamp(self.last_flush).isoformat()
+        }
     
     def get_metric_summary(self, metric_name: str, 
                           time_range: str = "1h") -> Dict[str, Any]:
         """Get summary for a specific metric"""
+        ttl = _SUMMARY_TTLS.get(time_range, _SUMMARY_TTLS["1h"])
+        try:
+            return self._cached_summary(metric_name, time_range, int(time.time() // ttl))
+        except Exception as e:
+            logger.error(f"Error getting metric summary: {e}")
+            return {
+                "metric_name": metric_name,
+                "error": str(e)
+            }
+    
+    def _compute_metric_summary(self, metric_name: str, time_range: str,
+                                bucket_id: int) -> Dict[str, Any]:
+        """Query the summary; bucket_id only partitions the cache"""
+        db = SessionLocal()
         try:
-            db = SessionLocal()
-            
             # Calculate time range
             now = datetime.utcnow()
             if time_range == "1h":
@@ -278,13 +422,21 @@ class MetricsCollector:
             else:
                 start_time = now - timedelta(hours=1)
             
-            # Query metrics
-            metrics = db.query(SystemMetric).filter(
+            in_range = (
                 SystemMetric.metric_name == metric_name,
                 SystemMetric.timestamp >= start_time
-            ).order_by(SystemMetric.timestamp).all()
+            )
+            
+            # Aggregate in the database rather than loading every row
+            count, total, average, min_value, max_value = db.query(
+                func.count(SystemMetric.id),
+                func.sum(SystemMetric.metric_value),
+                func.avg(SystemMetric.metric_value),
+                func.min(SystemMetric.metric_value),
+                func.max(SystemMetric.metric_value)
+            ).filter(*in_range).one()
             
-            if not metrics:
+            if not count:
                 return {
                     "metric_name": metric_name,
                     "time_range": time_range,
@@ -292,81 +444,77 @@ class MetricsCollector:
                     "data": []
                 }
             
-            # Calculate statistics
-            values = [m.metric_value for m in metrics]
+            # Only the latest 100 points are returned; fetched newest first, then
+            # reversed back into ascending order
+            recent = db.query(
+                SystemMetric.timestamp,
+                SystemMetric.metric_value,
+                SystemMetric.metadata
+            ).filter(*in_range).order_by(
+                SystemMetric.timestamp.desc()
+            ).limit(100).all()
             
             summary = {
                 "metric_name": metric_name,
                 "time_range": time_range,
-                "count": len(metrics),
-                "total": sum(values),
-                "average": sum(values) / len(values),
-                "min": min(values),
-                "max": max(values),
+                "count": count,
+                "total": total,
+                "average": float(average),
+                "min": min_value,
+                "max": max_value,
                 "data": [
                     {
-                        "timestamp": m.timestamp.isoformat(),
-                        "value": m.metric_value,
-                        "metadata": m.metadata
+                        "timestamp": timestamp.isoformat(),
+                        "value": value,
+                        "metadata": metadata
                     }
-                    for m in metrics[-100:]  # Limit to 100 data points
+                    for timestamp, value, metadata in reversed(recent)
                 ]
             }
             
             return summary
             
-        except Exception as e:
-            logger.error(f"Error getting metric summary: {e}")
-            return {
-                "metric_name": metric_name,
-                "error": str(e)
-            }
         finally:
             db.close()
     
     async def start_periodic_flush(self, interval: int = 60):
-        """Start periodic metric flushing"""
+        """Run the single flusher: drains every `interval` seconds or when woken by _check_flush"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.current_task()
+        
         while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            
             try:
                 await self._flush_metrics()
             except Exception as e:
                 logger.error(f"Periodic flush error: {e}")
-            
-            await asyncio.sleep(interval)
     
-    def create_timer(self, name: str) -> Callable:
-        """Create a timer context manager"""
-        class Timer:
-            def __init__(self, collector, name):
-                self.collector = collector
-                self.name = name
-                self.start_time = None
-            
-            def __enter__(self):
-                self.start_time = time.time()
-                return self
-            
-            def __exit__(self, exc_type, exc_val, exc_tb):
-                duration = time.time() - self.start_time
-                
-                if exc_type:
-                    status = "error"
-                    error_type = exc_type.__name__
-                    self.collector.record_error(
-                        error_type=error_type,
-                        component=self.name,
-                        message=str(exc_val)
-                    )
-                else:
-                    status = "success"
-                
-                self.collector.record_custom_metric(
-                    name=f"{self.name}_duration",
-                    value=duration,
-                    metadata={"status": status}
-                )
-        
-        return Timer(self, name)
+    @contextmanager
+    def create_timer(self, name: str) -> Iterator[None]:
+        """Time a block: records `<name>_duration`, plus an error if the block raises"""
+        start = time.perf_counter()
+        status = "success"
+        try:
+            yield
+        except BaseException as e:
+            status = "error"
+            self.record_error(
+                error_type=type(e).__name__,
+                component=name,
+                message=str(e)
+            )
+            raise
+        finally:
+            self.record_custom_metric(
+                name=f"{name}_duration",
+                value=time.perf_counter() - start,
+                metadata=_TIMER_META[status]
+            )
 
 
 # Global metrics collector instance
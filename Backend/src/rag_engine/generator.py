@@ -1,18 +1,77 @@
+import asyncio
+import html
 import openai
-from typing import Dict, Any, List, Optional
+import re
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional
 from datetime import datetime
-import json
+import orjson
 from ...config.settings import settings
 from ...monitoring.logger import get_logger
 from ...monitoring.metrics import metrics_collector
 
 logger = get_logger(__name__)
 
+# System prompt per response type (unknown types fall back to "analysis")
+_SYSTEM_PROMPTS = {
+    "analysis": """You are a financial and data analysis assistant. 
+    Analyze the provided data and provide insights, recommendations, and risk assessments.
+    Be concise, accurate, and data-driven.
+    Include confidence levels and urgency where applicable.""",
+    
+    "alert": """You are an alert generation system.
+    Create clear, actionable alerts based on the data.
+    Include severity levels, recommended actions, and context.
+    Be urgent but accurate.""",
+    
+    "summary": """You are a summarization system.
+    Create comprehensive summaries of data and trends.
+    Highlight key points, patterns, and implications.
+    Be thorough but concise.""",
+    
+    "explanation": """You are an explanation system.
+    Explain complex data and concepts in simple terms.
+    Provide context, implications, and next steps.
+    Be educational and informative."""
+}
+
+# Keyword scanners for _determine_urgency: one alternation pass per string instead
+# of one substring search per keyword (plain substring matching, as before)
+_URGENCY_KEYWORDS = (
+    'urgent', 'immediate', 'now', 'asap', 'emergency',
+    'critical', 'important', 'time-sensitive', 'alert'
+)
+_FINANCIAL_TERMS = ('stock', 'price', 'market', 'trade', 'buy', 'sell')
+_URGENCY_RE = re.compile("|".join(map(re.escape, _URGENCY_KEYWORDS)))
+_FINANCIAL_RE = re.compile("|".join(map(re.escape, _FINANCIAL_TERMS)))
+
+# Structured fields pulled out of LLM responses by _extract_structured_data, one
+# fused pattern per response type; each alternative has a single named group and
+# is a lookahead, so one field's match never swallows another field that follows
+# it (the same matches as a separate re.search per field)
+_STRUCTURED_RES = {
+    "analysis": re.compile(
+        r'(?=Confidence[:\s]*(?P<confidence>\d+)/10)'
+        r'|(?=Urgency[:\s]*(?P<urgency>\d+)/10)'
+        r'|(?=Expected Impact[:\s]*(?P<impact>\w+))'
+    ),
+    "alert": re.compile(
+        r'(?=(?i:Priority)[:\s]*(?P<priority>\w+))'
+        r'|(?=Action Recommended[:\s]*(?P<recommended_action>.+?)(?:\n|$))'
+    ),
+}
+_STRUCTURED_PARSERS = {
+    "confidence": int,
+    "urgency": int,
+    "priority": str.lower,
+    "recommended_action": str.strip,
+}
+
 class ResponseGenerator:
     """Response generator for RAG system using LLMs"""
     
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.LLM_MODEL
         self.max_tokens = 1000
         self.temperature = 0.7
@@ -65,7 +124,7 @@ Generated: {timestamp}"""
                                metadata: Dict[str, Any],
                                response_type: str = "analysis") -> Dict[str, Any]:
         """Generate response using LLM"""
-        start_time = datetime.utcnow()
+        start_time = time.monotonic()
         
         try:
             # Prepare prompt
@@ -80,7 +139,7 @@ Generated: {timestamp}"""
             )
             
             # Record metrics
-            duration = (datetime.utcnow() - start_time).total_seconds()
+            duration = time.monotonic() - start_time
             metrics_collector.record_query(
                 query_type=response_type,
                 status="success",
@@ -93,7 +152,7 @@ Generated: {timestamp}"""
             
         except Exception as e:
             # Record error
-            duration = (datetime.utcnow() - start_time).total_seconds()
+            duration = time.monotonic() - start_time
             metrics_collector.record_query(
                 query_type=response_type,
                 status="error",
@@ -122,11 +181,8 @@ Generated: {timestamp}"""
                      context: str, 
                      metadata: Dict[str, Any],
                      response_type: str) -> str:
-        """Build prompt for LLM"""
-        
-        system_prompt = self._get_system_prompt(response_type)
-        
-        user_prompt = f"""Query: {query}
+        """Build the user prompt; the system prompt is sent separately as the system message"""
+        return f"""Query: {query}
 
 Relevant Data Context:
 {context}
@@ -140,44 +196,31 @@ Additional Metadata:
 - Newest Data: {metadata.get('newest_data', 'unknown')}
 
 Please provide a {response_type} based on this information."""
-        
-        return f"{system_prompt}\n\n{user_prompt}"
     
     def _get_system_prompt(self, response_type: str) -> str:
         """Get system prompt based on response type"""
-        prompts = {
-            "analysis": """You are a financial and data analysis assistant. 
-            Analyze the provided data and provide insights, recommendations, and risk assessments.
-            Be concise, accurate, and data-driven.
-            Include confidence levels and urgency where applicable.""",
-            
-            "alert": """You are an alert generation system.
-            Create clear, actionable alerts based on the data.
-            Include severity levels, recommended actions, and context.
-            Be urgent but accurate.""",
-            
-            "summary": """You are a summarization system.
-            Create comprehensive summaries of data and trends.
-            Highlight key points, patterns, and implications.
-            Be thorough but concise.""",
-            
-            "explanation": """You are an explanation system.
-            Explain complex data and concepts in simple terms.
-            Provide context, implications, and next steps.
-            Be educational and informative."""
-        }
-        
-        return prompts.get(response_type, prompts["analysis"])
+        return _SYSTEM_PROMPTS.get(response_type, _SYSTEM_PROMPTS["analysis"])
+    
+    def _llm_messages(self, prompt: str, response_type: str) -> List[Dict[str, str]]:
+        """Chat messages for a prompt"""
+        return [
+            {"role": "system", "content": self._get_system_prompt(response_type)},
+            {"role": "user", "content": prompt}
+        ]
     
-    async def _call_llm(self, prompt: str, response_type: str) -> str:
-        """Call LLM API"""
+    async def _call_llm(self, prompt: str, response_type: str, stream: bool = False) -> str:
+        """Call LLM API; with stream=True the streamed deltas are collected into the full text"""
         try:
-            response = self.openai_client.chat.completions.create(
+            if stream:
+                # Collect chunks and join once; += on str is quadratic for long outputs
+                parts = []
+                async for delta in self._stream_llm(prompt, response_type):
+                    parts.append(delta)
+                return "".join(parts)
+            
+            response = await self.openai_client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt(response_type)},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._llm_messages(prompt, response_type),
                 max_tokens=self.max_tokens,
                 temperature=self.temperature,
                 timeout=30
@@ -197,6 +240,34 @@ Please provide a {response_type} based on this information."""
             logger.error(f"LLM call failed: {e}")
             raise
     
+    async def generate_response_stream(self,
+                                       query: str,
+                                       context: str,
+                                       metadata: Dict[str, Any],
+                                       response_type: str = "analysis") -> AsyncIterator[str]:
+        """Stream the raw LLM response text as it is generated"""
+        prompt = self._build_prompt(query, context, metadata, response_type)
+        
+        async for delta in self._stream_llm(prompt, response_type):
+            yield delta
+    
+    async def _stream_llm(self, prompt: str, response_type: str) -> AsyncIterator[str]:
+        """Yield the non-empty content deltas of a streamed completion"""
+        stream = await self.openai_client.chat.completions.create(
+            model=self.model,
+            messages=self._llm_messages(prompt, response_type),
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            timeout=30,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+    
     def _process_response(self, 
                          response: str, 
                          query: str, 
@@ -234,49 +305,22 @@ Please provide a {response_type} based on this information."""
     def _extract_structured_data(self, response: str, response_type: str) -> Dict[str, Any]:
         """Extract structured data from response"""
         try:
-            if response_type == "analysis":
-                # Try to find key-value pairs
-                import re
-                
-                structured = {}
-                
-                # Look for confidence
-                confidence_match = re.search(r'Confidence[:\s]*(\d+)/10', response)
-                if confidence_match:
-                    structured["confidence"] = int(confidence_match.group(1))
-                
-                # Look for urgency
-                urgency_match = re.search(r'Urgency[:\s]*(\d+)/10', response)
-                if urgency_match:
-                    structured["urgency"] = int(urgency_match.group(1))
-                
-                # Look for impact
-                impact_match = re.search(r'Expected Impact[:\s]*(\w+)', response)
-                if impact_match:
-                    structured["impact"] = impact_match.group(1)
-                
-                return structured
-                
-            elif response_type == "alert":
-                # Extract alert components
-                import re
-                
-                structured = {}
-                
-                # Extract priority
-                priority_match = re.search(r'Priority[:\s]*(\w+)', response, re.IGNORECASE)
-                if priority_match:
-                    structured["priority"] = priority_match.group(1).lower()
-                
-                # Extract action
-                action_match = re.search(r'Action Recommended[:\s]*(.+?)(?:\n|$)', response)
-                if action_match:
-                    structured["recommended_action"] = action_match.group(1).strip()
-                
-                return structured
-                
-            else:
+            pattern = _STRUCTURED_RES.get(response_type)
+            if pattern is None:
                 return {}
+            
+            # Single pass over the response; the first occurrence of each field wins
+            structured = {}
+            for match in pattern.finditer(response):
+                field = match.lastgroup
+                if field not in structured:
+                    value = match.group(field)
+                    parse = _STRUCTURED_PARSERS.get(field)
+                    structured[field] = parse(value) if parse else value
+                    if len(structured) == pattern.groups:
+                        break
+            
+            return structured
                 
         except Exception as e:
             logger.warning(f"Failed to extract structured data: {e}")
@@ -309,23 +353,13 @@ Please provide a {response_type} based on this information."""
         urgency = 0.3  # Base urgency
         
         # Check for urgency keywords in query
-        urgency_keywords = [
-            'urgent', 'immediate', 'now', 'asap', 'emergency',
-            'critical', 'important', 'time-sensitive', 'alert'
-        ]
-        
         query_lower = query.lower()
-        for keyword in urgency_keywords:
-            if keyword in query_lower:
-                urgency += 0.2
-                break
+        if _URGENCY_RE.search(query_lower):
+            urgency += 0.2
         
         # Check for urgency in response
-        response_lower = response.lower()
-        for keyword in urgency_keywords:
-            if keyword in response_lower:
-                urgency += 0.2
-                break
+        if _URGENCY_RE.search(response.lower()):
+            urgency += 0.2
         
         # Adjust based on data freshness
         freshness = metadata.get('freshness_score', 0)
@@ -333,11 +367,8 @@ Please provide a {response_type} based on this information."""
             urgency += 0.1
         
         # Check for financial terms (often time-sensitive)
-        financial_terms = ['stock', 'price', 'market', 'trade', 'buy', 'sell']
-        for term in financial_terms:
-            if term in query_lower:
-                urgency += 0.1
-                break
+        if _FINANCIAL_RE.search(query_lower):
+            urgency += 0.1
         
         return min(max(urgency, 0), 1)  # Clamp to 0-1
     
@@ -346,6 +377,13 @@ Please provide a {response_type} based on this information."""
                                          contexts: List[str],
                                          response_types: List[str]) -> List[Dict[str, Any]]:
         """Generate multiple responses in batch"""
+        # Cap in-flight LLM calls so large batches don't trip provider rate limits
+        semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        
+        async def bounded(query: str, context: str, metadata: Dict[str, Any], response_type: str):
+            async with semaphore:
+                return await self.generate_response(query, context, metadata, response_type)
+        
         tasks = []
         
         for query, context, response_type in zip(queries, contexts, response_types):
@@ -355,7 +393,7 @@ Please provide a {response_type} based on this information."""
                 "response_type": response_type
             }
             
-            task = self.generate_response(query, context, metadata, response_type)
+            task = bounded(query, context, metadata, response_type)
             tasks.append(task)
         
         # Execute all tasks
@@ -389,7 +427,7 @@ Please provide a {response_type} based on this information."""
         elif format == "markdown":
             return self._format_markdown_response(response_data)
         elif format == "json":
-            return json.dumps(response_data, indent=2)
+            return orjson.dumps(response_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
         else:
             return str(response_data)
     
@@ -410,25 +448,20 @@ Please provide a {response_type} based on this information."""
     
     def _format_html_response(self, response_data: Dict[str, Any]) -> str:
         """Format as HTML"""
-        response = response_data.get("response", "")
-        
-        # Convert to HTML
-        html = f"""
-        <div class="rag-response">
-            <div class="response-content">
-                {response.replace('\n', '<br>')}
-            </div>
-            <div class="response-metadata">
-                <small>
-                    Confidence: <span class="confidence">{response_data.get('confidence', 0):.0%}</span> | 
-                    Urgency: <span class="urgency">{response_data.get('urgency', 0):.0%}</span> | 
-                    Generated: {response_data.get('timestamp', '')}
-                </small>
-            </div>
-        </div>
-        """
-        
-        return html
+        # Escape the LLM text before inserting it into markup
+        content = html.escape(response_data.get("response", "")).replace("\n", "<br>")
+        timestamp = html.escape(str(response_data.get('timestamp', '')))
+        
+        return (
+            '<div class="rag-response">'
+            f'<div class="response-content">{content}</div>'
+            '<div class="response-metadata"><small>'
+            f'Confidence: <span class="confidence">{response_data.get("confidence", 0):.0%}</span> | '
+            f'Urgency: <span class="urgency">{response_data.get("urgency", 0):.0%}</span> | '
+            f'Generated: {timestamp}'
+            '</small></div>'
+            '</div>'
+        )
     
     def _format_markdown_response(self, response_data: Dict[str, Any]) -> str:
         """Format as Markdown"""
@@ -453,7 +486,7 @@ Please provide a {response_type} based on this information."""
             "model": self.model,
             "max_tokens": self.max_tokens,
             "temperature": self.temperature,
-            "query_stats": stats.get("queries", {}),
-            "error_stats": stats.get("errors", {}),
+            "query_stats": {k[8:]: v for k, v in stats.items() if k.startswith("queries.")},
+            "error_stats": {k[7:]: v for k, v in stats.items() if k.startswith("errors.")},
             "templates_available": list(self.templates.keys())
         }
\ No newline at end of file
@@ -1,15 +1,120 @@
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import asyncio
+import itertools
 import json
+import re
+import time
+from types import MappingProxyType
+import numpy as np
+from ..data_pipeline.processor import _parse_iso
 from ..data_pipeline.storage import TimeAwareVectorStore
 from ..config.settings import settings
 
+def _sort_epoch(value: Any) -> float:
+    """Sort key for a metadata timestamp: epoch seconds for ISO strings (naive taken as UTC) and numbers, -inf otherwise"""
+    if isinstance(value, str):
+        return _iso_epoch(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+        return float(value)
+    return float("-inf")
+
+@lru_cache(maxsize=65536)
+def _iso_epoch(value: str) -> float:
+    """Epoch seconds of an ISO timestamp string, -inf if unparseable"""
+    try:
+        parsed = _parse_iso(value)
+    except ValueError:
+        return float("-inf")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _copy_results(results: List[Dict]) -> List[Dict]:
+    """Copy search results down to their metadata dicts, which _add_temporal_context writes to"""
+    return [{**result, "metadata": dict(result["metadata"])} for result in results]
+
+# Results of a search that found nothing
+_NO_RESULTS_CONTEXT = "No relevant data found in the specified time range."
+_EMPTY_FRESHNESS = MappingProxyType({"score": 0, "oldest": None, "newest": None})
+
+def _format_financial(metadata: Dict[str, Any], recency: str) -> str:
+    """Context line for a financial quote"""
+    get = metadata.get
+    return f"[{recency}] {get('symbol')}: ${get('price')} ({get('change_percent')}) Volume: {get('volume') or 0:,}"
+
+def _format_news(metadata: Dict[str, Any], recency: str) -> str:
+    """Context line for a news sentiment summary"""
+    get = metadata.get
+    return (
+        f"[{recency}] NEWS for {get('symbol')}: "
+        f"Sentiment: {get('avg_sentiment', 0):.2f} "
+        f"({get('article_count', 0)} articles)"
+    )
+
+def _format_text(metadata: Dict[str, Any], recency: str) -> str:
+    """Context line for any other result with text content"""
+    return f"[{recency}] {metadata.get('text_content', '')[:200]}..."
+
+# Context line formatter per data_type; other results with text_content use _format_text
+_CONTEXT_FORMATTERS = {
+    "financial_quote": _format_financial,
+    "news_sentiment": _format_news,
+}
+
+# Query phrases that pin a time range; earlier entries win when several match
+_TIME_KEYWORDS = {
+    "last hour": "last_hour",
+    "last 6 hours": "last_6_hours",
+    "today": "last_24_hours",
+    "this week": "last_week",
+    "this month": "last_month",
+    "recent": "last_6_hours",
+    "latest": "last_hour",
+    "just now": "last_hour",
+    "yesterday": "last_24_hours",
+}
+_TIME_KEYWORD_RANK = {keyword: rank for rank, keyword in enumerate(_TIME_KEYWORDS)}
+_TIME_RE = re.compile("|".join(map(re.escape, _TIME_KEYWORDS)))
+
+# Context type of each query term; all terms are found in one scan, the
+# lookahead letting occurrences overlap as the old per-term `in` tests did
+_CONTEXT_TERMS = {
+    **dict.fromkeys(["stock", "price", "market", "trade", "invest", "share", "dollar", "currency"], "financial"),
+    **dict.fromkeys(["news", "article", "report", "announce", "update", "headline"], "news"),
+    **dict.fromkeys(["tweet", "post", "social", "comment", "mention", "reddit"], "social"),
+}
+_CONTEXT_TERM_RE = re.compile("(?=(%s))" % "|".join(map(re.escape, _CONTEXT_TERMS)))
+
 class TimeAwareRetriever:
     """Advanced retriever with temporal awareness"""
     
+    # Semantic cache: a query whose embedding is within SEMANTIC_CACHE_MIN_SIMILARITY
+    # (cosine) of a recent one with the same time range and filters reuses its search
+    SEMANTIC_CACHE_SIZE = 1024
+    SEMANTIC_CACHE_TTL = 300  # seconds
+    SEMANTIC_CACHE_MIN_SIMILARITY = 0.95
+    
+    # Random-hyperplane LSH used to find cache candidates without a full scan
+    LSH_TABLES = 4
+    LSH_BITS = 16
+    
     def __init__(self, vector_store: TimeAwareVectorStore):
         self.vector_store = vector_store
-        self.cache = {}  # Simple cache for frequent queries
+        
+        # Semantic cache entries: id -> (key, unit embedding, results, created, signatures)
+        self.cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self._cache_ids = itertools.count()
+        self._lsh_planes: Optional[np.ndarray] = None  # (LSH_TABLES, LSH_BITS, dim), built on first use
+        self._lsh_buckets: List[Dict[bytes, set]] = [{} for _ in range(self.LSH_TABLES)]
+        
+        # Concurrent searches are coalesced into vector_store.search_batch calls
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._batch_tasks = set()  # in-flight _run_batch tasks (strong refs)
+        self._closed = False
         
     async def retrieve(
         self,
@@ -34,22 +139,29 @@ class TimeAwareRetriever:
         if context_type != "all":
             search_filters["data_type"] = context_type
         
-        # Perform vector search
-        vector_results = self.vector_store.search_with_time_filter(
-            query=query,
-            time_range=time_range,
-            filters=search_filters,
-            top_k=15
-        )
-        
-        # Enhance with temporal relationships
-        enhanced_results = self._add_temporal_context(vector_results)
+        # Reuse a recent search for a near-identical query, otherwise run the
+        # vector search (batched with other in-flight retrievals)
+        cache_key = (time_range, json.dumps(search_filters, sort_keys=True, default=str))
+        embedding, signatures = self._lsh_signatures(await self.vector_store.embed_query_async(query))
+        vector_results = self._cache_lookup(cache_key, embedding, signatures)
+        if vector_results is None:
+            vector_results = await self._search(query, time_range, search_filters)
+            self._cache_store(cache_key, embedding, signatures, vector_results)
         
-        # Format for LLM consumption
-        context_text = self._format_context(enhanced_results)
-        
-        # Calculate freshness metrics
-        freshness = self._calculate_freshness_metrics(enhanced_results)
+        if not vector_results:
+            # Nothing to post-process
+            enhanced_results = vector_results
+            context_text = _NO_RESULTS_CONTEXT
+            freshness = _EMPTY_FRESHNESS
+        else:
+            # Enhance with temporal relationships
+            enhanced_results = self._add_temporal_context(vector_results)
+            
+            # Format for LLM consumption
+            context_text = self._format_context(enhanced_results)
+            
+            # Calculate freshness metrics
+            freshness = self._calculate_freshness_metrics(enhanced_results)
         
         return {
             "query": query,
@@ -65,25 +177,172 @@ class TimeAwareRetriever:
             }
         }
     
+    def _lsh_signatures(self, vector: List[float]) -> tuple:
+        """Unit-normalized embedding and its per-table LSH bucket keys"""
+        embedding = np.asarray(vector, dtype=np.float32)
+        embedding /= np.linalg.norm(embedding) or 1.0
+        
+        if self._lsh_planes is None:
+            rng = np.random.default_rng(0)
+            self._lsh_planes = rng.standard_normal(
+                (self.LSH_TABLES, self.LSH_BITS, embedding.shape[0])
+            ).astype(np.float32)
+        
+        bits = (self._lsh_planes @ embedding) > 0
+        return embedding, [np.packbits(row).tobytes() for row in bits]
+    
+    def _cache_lookup(self, key: tuple, embedding: np.ndarray, signatures: List[bytes]) -> Optional[List[Dict]]:
+        """Results of the most similar live cache entry sharing an LSH bucket, or None"""
+        now = time.monotonic()
+        candidates = set()
+        for buckets, signature in zip(self._lsh_buckets, signatures):
+            candidates.update(buckets.get(signature, ()))
+        
+        best_id = None
+        best_similarity = self.SEMANTIC_CACHE_MIN_SIMILARITY
+        for entry_id in candidates:
+            entry_key, entry_embedding, _, created, _ = self.cache[entry_id]
+            if now - created > self.SEMANTIC_CACHE_TTL:
+                self._cache_evict(entry_id)
+                continue
+            if entry_key != key:
+                continue
+            
+            similarity = float(entry_embedding @ embedding)
+            if similarity >= best_similarity:
+                best_id, best_similarity = entry_id, similarity
+        
+        if best_id is None:
+            return None
+        
+        self.cache.move_to_end(best_id)
+        return _copy_results(self.cache[best_id][2])
+    
+    def _cache_store(self, key: tuple, embedding: np.ndarray, signatures: List[bytes], results: List[Dict]):
+        """Add search results to the cache, evicting the least recently used past SEMANTIC_CACHE_SIZE"""
+        entry_id = next(self._cache_ids)
+        self.cache[entry_id] = (key, embedding, _copy_results(results), time.monotonic(), signatures)
+        for buckets, signature in zip(self._lsh_buckets, signatures):
+            buckets.setdefault(signature, set()).add(entry_id)
+        
+        while len(self.cache) > self.SEMANTIC_CACHE_SIZE:
+            self._cache_evict(next(iter(self.cache)))
+    
+    def _cache_evict(self, entry_id: int):
+        """Drop a cache entry and its LSH bucket references"""
+        _, _, _, _, signatures = self.cache.pop(entry_id)
+        for buckets, signature in zip(self._lsh_buckets, signatures):
+            bucket = buckets[signature]
+            bucket.discard(entry_id)
+            if not bucket:
+                del buckets[signature]
+    
+    async def _search(self, query: str, time_range: str, filters: Dict) -> List[Dict[str, Any]]:
+        """Queue a vector search for the next batch and wait for its results"""
+        if self._closed:
+            raise RuntimeError("Retriever is closed")
+        
+        # The queue outlives a dead dispatcher so a restart picks up what is already queued
+        if self._batch_queue is None:
+            self._batch_queue = asyncio.Queue()
+        if self._dispatch_task is None or self._dispatch_task.done():
+            self._dispatch_task = asyncio.create_task(self._dispatch_loop())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((query, time_range, filters, future))
+        return await future
+    
+    async def _dispatch_loop(self):
+        """Collect queued searches for up to RETRIEVAL_BATCH_WAIT_MS and run them grouped by filter"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = []
+            try:
+                batch.append(await self._batch_queue.get())
+                deadline = loop.time() + settings.RETRIEVAL_BATCH_WAIT_MS / 1000
+                
+                while len(batch) < settings.RETRIEVAL_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._batch_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Searches already taken off the queue would otherwise wait forever
+                self._fail_futures(batch, RuntimeError("Retriever dispatcher was cancelled"))
+                raise
+            
+            # Only searches with the same time range and filters can share a call
+            groups: Dict[tuple, List[tuple]] = {}
+            for item in batch:
+                key = (item[1], json.dumps(item[2], sort_keys=True, default=str))
+                groups.setdefault(key, []).append(item)
+            
+            # Run groups in the background so one slow call doesn't hold up the next batch
+            for items in groups.values():
+                task = asyncio.create_task(self._run_batch(items))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _run_batch(self, items: List[tuple]):
+        """Run one search_batch call and resolve each caller's future"""
+        _, time_range, filters, _ = items[0]
+        try:
+            results = await self.vector_store.search_batch(
+                queries=[query for query, _, _, _ in items],
+                time_range=time_range,
+                filters=filters,
+                top_k=15
+            )
+        except asyncio.CancelledError:
+            self._fail_futures(items, RuntimeError("Search batch was cancelled"))
+            raise
+        except Exception as e:
+            self._fail_futures(items, e)
+            return
+        
+        for (_, _, _, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+    
+    @staticmethod
+    def _fail_futures(items: List[tuple], error: Exception):
+        """Fail every still-pending caller future in a list of queued searches"""
+        for _, _, _, future in items:
+            if not future.done():
+                future.set_exception(error)
+    
+    async def close(self):
+        """Stop the search dispatcher; queued searches fail, ones already sent finish"""
+        self._closed = True
+        
+        if self._dispatch_task is not None and not self._dispatch_task.done():
+            self._dispatch_task.cancel()
+            try:
+                await self._dispatch_task
+            except asyncio.CancelledError:
+                pass
+        self._dispatch_task = None
+        
+        if self._batch_queue is not None:
+            leftover = []
+            while not self._batch_queue.empty():
+                leftover.append(self._batch_queue.get_nowait())
+            self._fail_futures(leftover, RuntimeError("Retriever is closed"))
+        
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+    
     def _infer_time_range_from_query(self, query: str) -> Optional[str]:
         """Infer time range from query text"""
         query_lower = query.lower()
         
-        time_keywords = {
-            "last hour": "last_hour",
-            "last 6 hours": "last_6_hours",
-            "today": "last_24_hours",
-            "this week": "last_week",
-            "this month": "last_month",
-            "recent": "last_6_hours",
-            "latest": "last_hour",
-            "just now": "last_hour",
-            "yesterday": "last_24_hours",
-        }
-        
-        for keyword, time_range in time_keywords.items():
-            if keyword in query_lower:
-                return time_range
+        matches = _TIME_RE.findall(query_lower)
+        if matches:
+            return _TIME_KEYWORDS[min(matches, key=_TIME_KEYWORD_RANK.__getitem__)]
         
         # Check for explicit time mentions
         if "hour" in query_lower and "24" not in query_lower:
@@ -99,13 +358,9 @@ class TimeAwareRetriever:
         """Detect what type of data is being asked for"""
         query_lower = query.lower()
         
-        financial_terms = ["stock", "price", "market", "trade", "invest", "share", "dollar", "currency"]
-        news_terms = ["news", "article", "report", "announce", "update", "headline"]
-        social_terms = ["tweet", "post", "social", "comment", "mention", "reddit"]
-        
-        financial_match = sum(1 for term in financial_terms if term in query_lower)
-        news_match = sum(1 for term in news_terms if term in query_lower)
-        social_match = sum(1 for term in social_terms if term in query_lower)
+        # Number of distinct terms of each type present in the query
+        counts = Counter(_CONTEXT_TERMS[term] for term in set(_CONTEXT_TERM_RE.findall(query_lower)))
+        financial_match, news_match, social_match = counts["financial"], counts["news"], counts["social"]
         
         if financial_match > news_match and financial_match > social_match:
             return "financial"
@@ -121,22 +376,23 @@ class TimeAwareRetriever:
         if not results:
             return results
         
-        # Sort by timestamp
+        # Sort by timestamp (numeric key; results without one go last)
         sorted_results = sorted(
             results,
-            key=lambda x: x["metadata"].get("timestamp", ""),
+            key=lambda x: _sort_epoch(x["metadata"].get("timestamp", "")),
             reverse=True
         )
         
         # Add temporal markers
+        now = datetime.utcnow()
         for i, result in enumerate(sorted_results):
             metadata = result["metadata"]
             
             # Add recency label
             if "timestamp" in metadata:
                 try:
-                    doc_time = datetime.fromisoformat(metadata["timestamp"].replace('Z', '+00:00'))
-                    hours_ago = (datetime.utcnow() - doc_time).total_seconds() / 3600
+                    doc_time = _parse_iso(metadata["timestamp"])
+                    hours_ago = (now - doc_time).total_seconds() / 3600
                     
                     if hours_ago < 1:
                         metadata["recency"] = "just now"
@@ -158,32 +414,20 @@ class TimeAwareRetriever:
     def _format_context(self, results: List[Dict]) -> str:
         """Format results into LLM-consumable context"""
         if not results:
-            return "No relevant data found in the specified time range."
+            return _NO_RESULTS_CONTEXT
         
         context_parts = ["RELEVANT DATA CONTEXT:"]
+        append = context_parts.append
         
-        for i, result in enumerate(results[:10]):  # Limit to top 10
+        for result in results[:10]:  # Limit to top 10
             metadata = result["metadata"]
             
             # Format based on data type
-            if metadata.get("data_type") == "financial_quote":
-                context_parts.append(
-                    f"[{metadata.get('recency', '')}] {metadata.get('symbol')}: "
-                    f"${metadata.get('price')} ({metadata.get('change_percent')}) "
-                    f"Volume: {metadata.get('volume'):,}"
-                )
-            
-            elif metadata.get("data_type") == "news_sentiment":
-                context_parts.append(
-                    f"[{metadata.get('recency', '')}] NEWS for {metadata.get('symbol')}: "
-                    f"Sentiment: {metadata.get('avg_sentiment', 0):.2f} "
-                    f"({metadata.get('article_count', 0)} articles)"
-                )
-            
-            elif "text_content" in metadata:
-                context_parts.append(
-                    f"[{metadata.get('recency', '')}] {metadata.get('text_content', '')[:200]}..."
-                )
+            formatter = _CONTEXT_FORMATTERS.get(metadata.get("data_type"))
+            if formatter is None and "text_content" in metadata:
+                formatter = _format_text
+            if formatter is not None:
+                append(formatter(metadata, metadata.get("recency", "")))
         
         # Add temporal summary
         context_parts.append(f"\nTEMPORAL SUMMARY: Data spans from most recent to oldest.")
@@ -193,27 +437,37 @@ class TimeAwareRetriever:
     def _calculate_freshness_metrics(self, results: List[Dict]) -> Dict[str, Any]:
         """Calculate freshness metrics for retrieved data"""
         if not results:
-            return {"score": 0, "oldest": None, "newest": None}
+            return dict(_EMPTY_FRESHNESS)
         
-        timestamps = []
+        # Oldest, newest and total age in one pass
+        now = datetime.utcnow()
+        oldest = newest = None
+        age_seconds = 0.0
+        count = 0
         for result in results:
             metadata = result["metadata"]
             if "timestamp" in metadata:
                 try:
-                    ts = datetime.fromisoformat(metadata["timestamp"].replace('Z', '+00:00'))
-                    timestamps.append(ts)
+                    ts = _parse_iso(metadata["timestamp"])
                 except:
                     continue
+                
+                if oldest is None:
+                    oldest = newest = ts
+                elif ts < oldest:
+                    oldest = ts
+                elif ts > newest:
+                    newest = ts
+                age_seconds += (now - ts).total_seconds()
+                count += 1
         
-        if not timestamps:
-            return {"score": 0, "oldest": None, "newest": None}
+        if not count:
+            return dict(_EMPTY_FRESHNESS)
         
-        oldest = min(timestamps)
-        newest = max(timestamps)
         time_span = (newest - oldest).total_seconds() / 3600
         
         # Freshness score: 1.0 = all within last hour, 0.0 = all older than 24h
-        avg_age_hours = sum([(datetime.utcnow() - ts).total_seconds() / 3600 for ts in timestamps]) / len(timestamps)
+        avg_age_hours = age_seconds / 3600 / count
         freshness_score = max(0, 1 - (avg_age_hours / 24))
         
         return {
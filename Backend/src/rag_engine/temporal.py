@@ -1,56 +1,89 @@
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-import pandas as pd
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from types import MappingProxyType
 import numpy as np
 from ...config.settings import settings
 from ...monitoring.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Time windows for different contexts
+_TIME_WINDOWS = MappingProxyType({
+    "realtime": timedelta(minutes=5),
+    "very_recent": timedelta(hours=1),
+    "recent": timedelta(hours=6),
+    "today": timedelta(hours=24),
+    "this_week": timedelta(days=7),
+    "this_month": timedelta(days=30),
+    "historical": timedelta(days=365)
+})
+
+# Seasonal patterns for different data types
+_SEASONAL_PATTERNS = MappingProxyType({
+    "financial": {
+        "trading_hours": {
+            "weekday": {"start": "09:30", "end": "16:00", "timezone": "America/New_York"},
+            "closed": ["SAT", "SUN"]
+        },
+        "earnings_season": {
+            "quarters": ["Q1", "Q2", "Q3", "Q4"],
+            "typical_months": [1, 4, 7, 10]
+        }
+    },
+    "news": {
+        "peak_hours": ["09:00-12:00", "14:00-17:00"],
+        "slow_hours": ["00:00-06:00"]
+    },
+    "social_media": {
+        "peak_hours": ["12:00-14:00", "19:00-22:00"],
+        "weekend_activity": 1.5  # Weekend multiplier
+    }
+})
+
+# Fallback formats for timestamp strings fromisoformat rejects
+_ISO_Z_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+_ISO_SPACE_FORMAT = "%Y-%m-%d %H:%M:%S"
+_SLASH_FORMAT = "%Y/%m/%d %H:%M:%S"
+_RFC_2822_FORMAT = "%a, %d %b %Y %H:%M:%S %Z"
+
+def _fallback_format(value: str) -> str:
+    """The one fallback format a string's shape allows (the formats' shapes don't overlap)"""
+    if value[:1].isalpha():
+        return _RFC_2822_FORMAT
+    if "/" in value[:10]:
+        return _SLASH_FORMAT
+    if "T" in value:
+        return _ISO_Z_FORMAT
+    return _ISO_SPACE_FORMAT
+
+@lru_cache(maxsize=65536)
+def _parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse a timestamp string (ISO first, then its fallback format); None if neither matches.
+    
+    Memoized, failures included, since the same document timestamps recur.
+    """
+    # Names like "Mon, ..." can't be ISO, so skip the doomed fromisoformat
+    if not value[:1].isalpha():
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            pass
+    
+    try:
+        return datetime.strptime(value, _fallback_format(value))
+    except ValueError:
+        return None
+
 class TemporalContextManager:
     """Manager for temporal context in RAG system"""
     
     def __init__(self):
-        self.time_windows = self._define_time_windows()
-        self.seasonal_patterns = self._load_seasonal_patterns()
+        self.time_windows = _TIME_WINDOWS
+        self.seasonal_patterns = _SEASONAL_PATTERNS
         self.temporal_cache = {}
         self.cache_ttl = 300  # 5 minutes
     
-    def _define_time_windows(self) -> Dict[str, timedelta]:
-        """Define time windows for different contexts"""
-        return {
-            "realtime": timedelta(minutes=5),
-            "very_recent": timedelta(hours=1),
-            "recent": timedelta(hours=6),
-            "today": timedelta(hours=24),
-            "this_week": timedelta(days=7),
-            "this_month": timedelta(days=30),
-            "historical": timedelta(days=365)
-        }
-    
-    def _load_seasonal_patterns(self) -> Dict[str, Any]:
-        """Load seasonal patterns for different data types"""
-        return {
-            "financial": {
-                "trading_hours": {
-                    "weekday": {"start": "09:30", "end": "16:00", "timezone": "America/New_York"},
-                    "closed": ["SAT", "SUN"]
-                },
-                "earnings_season": {
-                    "quarters": ["Q1", "Q2", "Q3", "Q4"],
-                    "typical_months": [1, 4, 7, 10]
-                }
-            },
-            "news": {
-                "peak_hours": ["09:00-12:00", "14:00-17:00"],
-                "slow_hours": ["00:00-06:00"]
-            },
-            "social_media": {
-                "peak_hours": ["12:00-14:00", "19:00-22:00"],
-                "weekend_activity": 1.5  # Weekend multiplier
-            }
-        }
-    
     def analyze_temporal_context(self, 
                                 query: str, 
                                 data_points: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -75,17 +108,20 @@ class TemporalContextManager:
         newest = timestamps[-1]
         time_span = newest - oldest
         
+        # One datetime64 array shared by the distribution, pattern and score passes
+        ts64 = self._to_datetime64(timestamps)
+        
         # Calculate distribution
-        distribution = self._calculate_time_distribution(timestamps)
+        distribution = self._calculate_time_distribution(timestamps, ts64)
         
         # Detect patterns
-        patterns = self._detect_temporal_patterns(timestamps, data_points)
+        patterns = self._detect_temporal_patterns(timestamps, data_points, ts64)
         
         # Determine relevance time window
         relevance_window = self._determine_relevance_window(query, timestamps)
         
         # Calculate temporal score
-        temporal_score = self._calculate_temporal_score(timestamps, query)
+        temporal_score = self._calculate_temporal_score(timestamps, query, ts64)
         
         return {
             "timestamps_analyzed": len(timestamps),
@@ -96,7 +132,7 @@ class TemporalContextManager:
             "patterns_detected": patterns,
             "recommended_time_window": relevance_window,
             "temporal_score": temporal_score,
-            "temporal_context": self._generate_temporal_context(timestamps, query),
+            "temporal_context": self._generate_temporal_context(timestamps, query, patterns),
             "analysis_timestamp": datetime.utcnow().isoformat()
         }
     
@@ -113,57 +149,47 @@ class TemporalContextManager:
                 if isinstance(value, datetime):
                     return value
                 elif isinstance(value, str):
-                    try:
-                        return datetime.fromisoformat(value.replace('Z', '+00:00'))
-                    except:
-                        try:
-                            # Try common formats
-                            formats = [
-                                "%Y-%m-%dT%H:%M:%S.%fZ",
-                                "%Y-%m-%d %H:%M:%S",
-                                "%Y/%m/%d %H:%M:%S",
-                                "%a, %d %b %Y %H:%M:%S %Z"
-                            ]
-                            for fmt in formats:
-                                try:
-                                    return datetime.strptime(value, fmt)
-                                except:
-                                    continue
-                        except:
-                            continue
+                    parsed = _parse_timestamp(value)
+                    if parsed is not None:
+                        return parsed
         
         return None
     
-    def _calculate_time_distribution(self, timestamps: List[datetime]) -> Dict[str, Any]:
+    def _to_datetime64(self, timestamps: List[datetime]) -> np.ndarray:
+        """Timestamps as a datetime64[us] array of naive UTC values (aware ones are converted first)"""
+        return np.array(
+            [ts if ts.tzinfo is None else ts.astimezone(timezone.utc).replace(tzinfo=None) for ts in timestamps],
+            dtype="datetime64[us]"
+        )
+    
+    def _calculate_time_distribution(self,
+                                    timestamps: List[datetime],
+                                    ts64: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """Calculate time distribution of data points"""
         if not timestamps:
             return {}
         
-        # Convert to DataFrame for analysis
-        df = pd.DataFrame({
-            "timestamp": timestamps,
-            "hour": [ts.hour for ts in timestamps],
-            "day_of_week": [ts.weekday() for ts in timestamps],
-            "date": [ts.date() for ts in timestamps]
-        })
+        if ts64 is None:
+            ts64 = self._to_datetime64(timestamps)
         
         # Hourly distribution
-        hourly_dist = df["hour"].value_counts().sort_index().to_dict()
+        hour_counts = np.bincount(ts64.astype("datetime64[h]").astype(np.int64) % 24, minlength=24)
+        hourly_dist = {hour: int(count) for hour, count in enumerate(hour_counts) if count}
         
         # Daily distribution
-        daily_dist = df["date"].value_counts().sort_index()
+        dates, date_counts = np.unique(ts64.astype("datetime64[D]"), return_counts=True)
         daily_trend = {
-            "dates": [date.isoformat() for date in daily_dist.index],
-            "counts": daily_dist.values.tolist()
+            "dates": [str(date) for date in dates],
+            "counts": date_counts.tolist()
         }
         
-        # Calculate recency
-        now = datetime.utcnow()
+        # Calculate recency from one vector of ages in seconds
+        age = (np.datetime64(datetime.utcnow(), "us") - ts64) / np.timedelta64(1, "s")
         recency_stats = {
-            "within_1_hour": sum(1 for ts in timestamps if (now - ts).total_seconds() <= 3600),
-            "within_6_hours": sum(1 for ts in timestamps if (now - ts).total_seconds() <= 21600),
-            "within_24_hours": sum(1 for ts in timestamps if (now - ts).total_seconds() <= 86400),
-            "older_than_24_hours": sum(1 for ts in timestamps if (now - ts).total_seconds() > 86400)
+            "within_1_hour": int((age <= 3600).sum()),
+            "within_6_hours": int((age <= 21600).sum()),
+            "within_24_hours": int((age <= 86400).sum()),
+            "older_than_24_hours": int((age > 86400).sum())
         }
         
         return {
@@ -175,17 +201,22 @@ class TemporalContextManager:
     
     def _detect_temporal_patterns(self, 
                                  timestamps: List[datetime], 
-                                 data_points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                                 data_points: List[Dict[str, Any]],
+                                 ts64: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
         """Detect temporal patterns in data"""
         patterns = []
         
         if len(timestamps) < 3:
             return patterns
         
+        # All numeric work below runs on one datetime64 array
+        if ts64 is None:
+            ts64 = self._to_datetime64(timestamps)
+        
         # Check for clustering
-        time_diffs = np.diff([ts.timestamp() for ts in timestamps])
-        avg_diff = np.mean(time_diffs)
-        std_diff = np.std(time_diffs)
+        time_diffs = np.diff(ts64) / np.timedelta64(1, "s")
+        avg_diff = time_diffs.mean()
+        std_diff = time_diffs.std()
         
         if std_diff < avg_diff * 0.5:  # Regular intervals
             patterns.append({
@@ -195,19 +226,19 @@ class TemporalContextManager:
             })
         
         # Check for recency bias
-        now = datetime.utcnow().timestamp()
-        recent_timestamps = [ts for ts in timestamps if (now - ts.timestamp()) <= 3600]
+        age = (np.datetime64(datetime.utcnow(), "us") - ts64) / np.timedelta64(1, "s")
+        recent_count = int((age <= 3600).sum())
         
-        if len(recent_timestamps) > len(timestamps) * 0.5:
+        if recent_count > len(timestamps) * 0.5:
             patterns.append({
                 "type": "recency_bias",
-                "recent_percentage": len(recent_timestamps) / len(timestamps),
+                "recent_percentage": recent_count / len(timestamps),
                 "description": "Most data points are very recent"
             })
         
         # Check for time gaps
         if len(time_diffs) > 0:
-            max_gap = max(time_diffs)
+            max_gap = time_diffs.max()
             if max_gap > 3600:  # Gap larger than 1 hour
                 patterns.append({
                     "type": "time_gap",
@@ -217,13 +248,10 @@ class TemporalContextManager:
                 })
         
         # Check for seasonal patterns
-        hourly_counts = {}
-        for ts in timestamps:
-            hour = ts.hour
-            hourly_counts[hour] = hourly_counts.get(hour, 0) + 1
+        hourly_counts = np.bincount(ts64.astype("datetime64[h]").astype(np.int64) % 24, minlength=24)
         
-        peak_hours = [hour for hour, count in hourly_counts.items() 
-                     if count > len(timestamps) * 0.1]  # More than 10% of data
+        # More than 10% of data
+        peak_hours = np.flatnonzero(hourly_counts > len(timestamps) * 0.1).tolist()
         
         if peak_hours:
             patterns.append({
@@ -277,19 +305,21 @@ class TemporalContextManager:
     
     def _calculate_temporal_score(self, 
                                  timestamps: List[datetime], 
-                                 query: str) -> float:
+                                 query: str,
+                                 ts64: Optional[np.ndarray] = None) -> float:
         """Calculate temporal relevance score (0-1)"""
         if not timestamps:
             return 0.0
         
-        now = datetime.utcnow()
+        if ts64 is None:
+            ts64 = self._to_datetime64(timestamps)
         
-        # Calculate average age
-        ages = [(now - ts).total_seconds() / 3600 for ts in timestamps]
-        avg_age = sum(ages) / len(ages)
+        # Ages in hours against one snapshot of now
+        ages = (np.datetime64(datetime.utcnow(), "us") - ts64) / np.timedelta64(1, "h")
+        avg_age = float(ages.mean())
         
         # Calculate age diversity
-        age_std = np.std(ages) if len(ages) > 1 else 0
+        age_std = ages.std() if len(ages) > 1 else 0
         
         # Base score based on recency (lower age = higher score)
         recency_score = 1 / (1 + avg_age/24)  # Decay over 24 hours
@@ -317,7 +347,8 @@ class TemporalContextManager:
     
     def _generate_temporal_context(self, 
                                   timestamps: List[datetime], 
-                                  query: str) -> str:
+                                  query: str,
+                                  patterns: Optional[List[Dict[str, Any]]] = None) -> str:
         """Generate human-readable temporal context"""
         if not timestamps:
             return "No temporal data available"
@@ -350,8 +381,9 @@ class TemporalContextManager:
         else:
             context += f"Analysis based on {len(timestamps)} data points."
         
-        # Add pattern information
-        patterns = self._detect_temporal_patterns(timestamps, [])
+        # Add pattern information (reusing the caller's detection when given)
+        if patterns is None:
+            patterns = self._detect_temporal_patterns(timestamps, [])
         if patterns:
             pattern_descs = []
             for pattern in patterns:
@@ -387,34 +419,51 @@ class TemporalContextManager:
     def enhance_with_temporal_features(self, 
                                       data_points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Enhance data points with temporal features"""
-        enhanced_points = []
+        enhanced_points = [dict(point) for point in data_points]
         
-        for point in data_points:
-            enhanced = dict(point)
-            timestamp = self._extract_timestamp(point)
-            
+        timestamps = []
+        targets = []
+        for enhanced in enhanced_points:
+            timestamp = self._extract_timestamp(enhanced)
             if timestamp:
-                # Add temporal features
-                enhanced["_temporal_features"] = {
-                    "hour_of_day": timestamp.hour,
-                    "day_of_week": timestamp.weekday(),
-                    "day_of_month": timestamp.day,
-                    "month": timestamp.month,
-                    "is_weekend": timestamp.weekday() >= 5,
-                    "is_business_hours": self._is_business_hours(timestamp),
-                    "time_since_midnight": timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second,
-                    "days_since_epoch": (timestamp - datetime(1970, 1, 1)).days
-                }
-                
-                # Add recency score
-                now = datetime.utcnow()
-                age_hours = (now - timestamp).total_seconds() / 3600
-                enhanced["_temporal_features"]["recency_score"] = 1 / (1 + age_hours/24)
-            
-            enhanced_points.append(enhanced)
+                timestamps.append(timestamp)
+                targets.append(enhanced)
+        
+        if not timestamps:
+            return enhanced_points
+        
+        columns = self._temporal_feature_columns(timestamps)
+        names = list(columns)
+        for enhanced, values in zip(targets, zip(*(column.tolist() for column in columns.values()))):
+            enhanced["_temporal_features"] = dict(zip(names, values))
         
         return enhanced_points
     
+    def _temporal_feature_columns(self, timestamps: List[datetime]) -> Dict[str, np.ndarray]:
+        """Feature name -> array, computed as column ops over one datetime64 array"""
+        ts64 = self._to_datetime64(timestamps)
+        days = ts64.astype("datetime64[D]")
+        months = ts64.astype("datetime64[M]")
+        
+        seconds_of_day = (ts64 - days) // np.timedelta64(1, "s")
+        hours = seconds_of_day // 3600
+        days_since_epoch = days.astype(np.int64)
+        weekdays = (days_since_epoch + 3) % 7  # 1970-01-01 was a Thursday
+        is_weekend = weekdays >= 5
+        age_hours = (np.datetime64(datetime.utcnow(), "us") - ts64) / np.timedelta64(1, "h")
+        
+        return {
+            "hour_of_day": hours,
+            "day_of_week": weekdays,
+            "day_of_month": (days - months) // np.timedelta64(1, "D") + 1,
+            "month": months.astype(np.int64) % 12 + 1,
+            "is_weekend": is_weekend,
+            "is_business_hours": ~is_weekend & (hours >= 9) & (hours < 17),
+            "time_since_midnight": seconds_of_day,
+            "days_since_epoch": days_since_epoch,
+            "recency_score": 1 / (1 + age_hours / 24)
+        }
+    
     def _is_business_hours(self, timestamp: datetime) -> bool:
         """Check if timestamp is during business hours"""
         # 9 AM to 5 PM, Monday to Friday
@@ -483,29 +532,27 @@ class TemporalContextManager:
             "hours_since_newest": round(newest_age, 1)
         })
         
-        # Distribution insight
-        hourly_counts = {}
-        for ts in timestamps:
-            hour = ts.hour
-            hourly_counts[hour] = hourly_counts.get(hour, 0) + 1
-        
-        if hourly_counts:
-            peak_hour = max(hourly_counts.items(), key=lambda x: x[1])[0]
-            insights["insights"].append({
-                "type": "peak_activity",
-                "description": f"Peak activity at {peak_hour}:00 UTC",
-                "peak_hour": peak_hour,
-                "peak_count": hourly_counts[peak_hour]
-            })
+        # Distribution insight (ties go to the earliest hour)
+        hourly_counts = np.bincount(
+            np.fromiter((ts.hour for ts in timestamps), dtype=np.int64, count=len(timestamps)),
+            minlength=24
+        )
+        peak_hour = int(hourly_counts.argmax())
+        insights["insights"].append({
+            "type": "peak_activity",
+            "description": f"Peak activity at {peak_hour}:00 UTC",
+            "peak_hour": peak_hour,
+            "peak_count": int(hourly_counts[peak_hour])
+        })
         
         # Data type specific insights
         if data_type == "financial":
-            market_hours = [ts for ts in timestamps if 9 <= ts.hour < 17]
+            market_hours_count = int(hourly_counts[9:17].sum())
             insights["insights"].append({
                 "type": "market_hours",
-                "description": f"{len(market_hours)} data points during market hours (9AM-5PM)",
-                "market_hours_count": len(market_hours),
-                "non_market_hours_count": len(timestamps) - len(market_hours)
+                "description": f"{market_hours_count} data points during market hours (9AM-5PM)",
+                "market_hours_count": market_hours_count,
+                "non_market_hours_count": len(timestamps) - market_hours_count
             })
         
         return insights
\ No newline at end of file
@@ -6,6 +6,7 @@ This module provides helper functions and utilities.
 
 from .helpers import (
     generate_id,
+    generate_ids,
     format_timestamp,
     validate_email,
     safe_json_loads,
@@ -34,6 +35,7 @@ from .validators import (
 
 __all__ = [
     'generate_id',
+    'generate_ids',
     'format_timestamp',
     'validate_email',
     'safe_json_loads',
@@ -0,0 +1,109 @@
+"""
+DashboardService stale-while-revalidate cache: fresh entries are served as-is,
+stale ones immediately with a single background rebuild, and missing or
+expired ones are built once for all concurrent callers.
+"""
+
+import asyncio
+import time
+
+from src.monitoring.dashboard import DashboardService
+
+
+class Factory:
+    """Async factory that counts its calls and returns `value`, optionally after `gate` is set"""
+
+    def __init__(self, value, gate: asyncio.Event = None):
+        self.value = value
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return self.value
+
+
+def _age(service, key, fresh_for, stale_for):
+    """Rewrite an entry's fresh/stale deadlines relative to now"""
+    data, _, _ = service.metrics_cache[key]
+    now = time.monotonic()
+    service.metrics_cache[key] = (data, now + fresh_for, now + stale_for)
+
+
+def test_fresh_entry_is_served_without_rebuilding():
+    async def run():
+        service = DashboardService()
+        factory = Factory({"v": 1})
+        first = await service._get_swr("overview", factory)
+        second = await service._get_swr("overview", factory)
+        return first, second, factory.calls
+
+    assert asyncio.run(run()) == ({"v": 1}, {"v": 1}, 1)
+
+
+def test_missing_entry_is_built_once_for_concurrent_callers():
+    async def run():
+        service = DashboardService()
+        factory = Factory({"v": 1})
+        results = await asyncio.gather(*(service._get_swr("overview", factory) for _ in range(5)))
+        return results, factory.calls
+
+    results, calls = asyncio.run(run())
+
+    assert results == [{"v": 1}] * 5
+    assert calls == 1
+
+
+def test_stale_entry_is_served_while_one_background_refresh_runs():
+    async def run():
+        service = DashboardService()
+        await service._get_swr("overview", Factory({"v": "old"}))
+        _age(service, "overview", fresh_for=-1, stale_for=60)
+
+        gate = asyncio.Event()
+        refresh = Factory({"v": "new"}, gate)
+        served = []
+        for _ in range(3):
+            served.append(await service._get_swr("overview", refresh))
+            await asyncio.sleep(0)
+        tasks_while_refreshing = len(service._refresh_tasks)
+
+        gate.set()
+        await asyncio.gather(*service._refresh_tasks)
+        after = await service._get_swr("overview", refresh)
+        return served, tasks_while_refreshing, after, refresh.calls
+
+    served, tasks_while_refreshing, after, calls = asyncio.run(run())
+
+    assert served == [{"v": "old"}] * 3
+    assert tasks_while_refreshing == 1
+    assert after == {"v": "new"}
+    assert calls == 1
+
+
+def test_failed_background_refresh_keeps_serving_the_stale_entry():
+    async def failing():
+        raise RuntimeError("database down")
+
+    async def run():
+        service = DashboardService()
+        await service._get_swr("overview", Factory({"v": "old"}))
+        _age(service, "overview", fresh_for=-1, stale_for=60)
+
+        served = await service._get_swr("overview", failing)
+        await asyncio.gather(*service._refresh_tasks)
+        return served, await service._get_swr("overview", failing)
+
+    assert asyncio.run(run()) == ({"v": "old"}, {"v": "old"})
+
+
+def test_expired_entry_is_rebuilt_inline():
+    async def run():
+        service = DashboardService()
+        await service._get_swr("overview", Factory({"v": "old"}))
+        _age(service, "overview", fresh_for=-2, stale_for=-1)
+        return await service._get_swr("overview", Factory({"v": "new"}))
+
+    assert asyncio.run(run()) == {"v": "new"}
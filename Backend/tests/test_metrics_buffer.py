@@ -0,0 +1,101 @@
+"""
+MetricsCollector buffering: _MetricColumns keeps samples oldest first through
+take()/restore(), and a failed COPY leaves its batch in place for the next flush.
+"""
+
+import asyncio
+
+import pytest
+
+from src.monitoring import metrics as metrics_module
+from src.monitoring.metrics import _MetricColumns
+
+
+def _fill(buffer, names):
+    for i, name in enumerate(names):
+        buffer.append(name, float(i), {"i": i})
+
+
+class FakeSession:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    """The module's collector with an empty buffer and no database"""
+    collector = metrics_module.metrics_collector
+    monkeypatch.setattr(collector, "metrics_buffer", _MetricColumns(800))
+    monkeypatch.setattr(metrics_module, "SessionLocal", FakeSession)
+    return collector
+
+
+def test_take_returns_oldest_samples_in_order():
+    buffer = _MetricColumns(100)
+    _fill(buffer, ["a", "b", "c", "d"])
+
+    names, values, _, metadata = buffer.take(3)
+
+    assert names == ["a", "b", "c"]
+    assert list(values) == [0.0, 1.0, 2.0]
+    assert metadata == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert buffer.names == ["d"]
+
+
+def test_restore_puts_a_batch_back_in_front_of_newer_samples():
+    buffer = _MetricColumns(100)
+    _fill(buffer, ["a", "b", "c"])
+
+    batch = buffer.take(2)
+    buffer.append("d", 3.0)
+    buffer.restore(batch)
+
+    assert buffer.names == ["a", "b", "c", "d"]
+    assert list(buffer.values) == [0.0, 1.0, 2.0, 3.0]
+    assert len(buffer.timestamps) == len(buffer.metadata) == 4
+
+
+def test_append_when_full_drops_the_oldest_quarter():
+    buffer = _MetricColumns(8)
+    _fill(buffer, [f"m{i}" for i in range(9)])
+
+    assert buffer.names == ["m2", "m3", "m4", "m5", "m6", "m7", "m8"]
+
+
+def test_failed_copy_keeps_the_batch_for_the_next_flush(collector, monkeypatch):
+    _fill(collector.metrics_buffer, ["a", "b", "c"])
+    written = []
+    failures = [RuntimeError("COPY failed")]
+
+    def write_batch(db, batch):
+        if failures:
+            raise failures.pop()
+        written.append(batch[0])
+
+    monkeypatch.setattr(collector, "_write_batch", write_batch)
+
+    asyncio.run(collector._flush_metrics())
+    assert collector.metrics_buffer.names == ["a", "b", "c"]
+    assert written == []
+
+    asyncio.run(collector._flush_metrics())
+    assert written == [["a", "b", "c"]]
+    assert len(collector.metrics_buffer) == 0
+
+
+def test_failed_batch_is_restored_after_earlier_batches_are_written(collector, monkeypatch):
+    monkeypatch.setattr(collector, "FLUSH_BATCH", 2)
+    _fill(collector.metrics_buffer, ["a", "b", "c", "d", "e"])
+    written = []
+
+    def write_batch(db, batch):
+        if batch[0] == ["c", "d"]:
+            raise RuntimeError("COPY failed")
+        written.append(batch[0])
+
+    monkeypatch.setattr(collector, "_write_batch", write_batch)
+
+    asyncio.run(collector._flush_metrics())
+
+    assert written == [["a", "b"]]
+    assert collector.metrics_buffer.names == ["c", "d", "e"]
@@ -0,0 +1,113 @@
+"""
+Parity tests: the vectorized DataProcessor batch paths must produce the same
+records as processing each item on its own with process().
+"""
+
+import asyncio
+
+import pytest
+
+from src.data_pipeline.processor import DataProcessor
+
+
+def _process_both(items):
+    """Run items through batch_process and through per-item process()"""
+    async def run():
+        processor = DataProcessor()
+        batch = await processor.batch_process(items)
+        single = [await processor.process(item) for item in items]
+        return batch, single
+
+    return asyncio.run(run())
+
+
+def _without(record, *keys):
+    """Copy of record without keys that legitimately differ between runs"""
+    return {key: value for key, value in record.items() if key not in keys}
+
+
+def test_financial_batch_matches_process():
+    quotes = [
+        {"data_type": "financial_quote", "symbol": "aapl", "price": "189.5", "change": 1.25,
+         "change_percent": "+0.66%", "volume": 52_000_000, "timestamp": "2024-01-02T15:30:00Z",
+         "source": "alpha_vantage", "market_cap": 2.9e12},
+        {"data_type": "financial_quote", "symbol": "tsla", "price": 0, "change": -3,
+         "change_percent": 3, "volume": 0, "timestamp": "2024-01-02T15:30:01Z"},
+        {"data_type": "financial_quote", "symbol": "msft", "price": 410.1, "change": 0,
+         "change_percent": None, "volume": 250_000, "timestamp": "2024-01-02T15:30:02Z"},
+        {"data_type": "financial_quote", "symbol": "amzn", "price": 151.0, "change": 0.5,
+         "change_percent": ["bad"], "volume": True, "timestamp": "2024-01-02T15:30:03Z"},
+        {"data_type": "financial_quote", "symbol": "goog", "timestamp": "2024-01-02T15:30:04Z"},
+    ]
+
+    batch, single = _process_both(quotes)
+
+    assert len(batch) == len(single)
+    for got, expected in zip(batch, single):
+        assert _without(got, "processed_at") == _without(expected, "processed_at")
+
+
+def test_financial_batch_falls_back_on_bad_row():
+    quotes = [
+        {"data_type": "financial_quote", "symbol": "aapl", "price": 189.5, "timestamp": "t1"},
+        {"data_type": "financial_quote", "symbol": "tsla", "price": "not a price", "timestamp": "t2"},
+    ]
+
+    batch, single = _process_both(quotes)
+
+    assert _without(batch[0], "processed_at") == _without(single[0], "processed_at")
+    assert batch[1]["status"] == single[1]["status"] == "processing_failed"
+
+
+def test_sensor_batch_matches_process():
+    readings = [
+        {"data_type": "sensor_data", "sensor_id": "t-1", "sensor_type": "temperature", "value": 42,
+         "unit": "C", "timestamp": "2024-01-02T15:30:00Z", "battery_level": 0.8},
+        {"data_type": "sensor_data", "sensor_id": "t-2", "sensor_type": "Temperature", "value": "5.5",
+         "unit": "C", "timestamp": "2024-01-02T15:30:01Z"},
+        {"data_type": "sensor_data", "sensor_id": "h-1", "sensor_type": "humidity", "value": 85,
+         "unit": "%", "timestamp": "2024-01-02T15:30:02Z", "location": {"room": "lab"}},
+        {"data_type": "sensor_data", "sensor_id": "p-1", "sensor_type": "pressure", "value": 880,
+         "unit": "hPa", "timestamp": "2024-01-02T15:30:03Z"},
+        {"data_type": "sensor_data", "sensor_id": (1, 2), "sensor_type": "light", "value": 300,
+         "unit": (3, 4), "timestamp": "2024-01-02T15:30:04Z"},
+        {"data_type": "sensor_data", "sensor_id": "x-1", "timestamp": "2024-01-02T15:30:05Z"},
+    ]
+
+    batch, single = _process_both(readings)
+
+    assert len(batch) == len(single)
+    for got, expected in zip(batch, single):
+        assert _without(got, "processed_at") == _without(expected, "processed_at")
+
+
+def test_sensor_batch_falls_back_on_non_string_type():
+    readings = [
+        {"data_type": "sensor_data", "sensor_id": "t-1", "sensor_type": "temperature", "value": 20, "timestamp": "t1"},
+        {"data_type": "sensor_data", "sensor_id": "t-2", "sensor_type": None, "value": 20, "timestamp": "t2"},
+    ]
+
+    batch, single = _process_both(readings)
+
+    assert _without(batch[0], "processed_at") == _without(single[0], "processed_at")
+    assert batch[1]["status"] == single[1]["status"] == "processing_failed"
+
+
+def test_social_batch_matches_process():
+    posts = [
+        {"data_type": "social_media", "platform": "x", "author": "@desk", "content": "Breaking:  ACME Corp beats by 12%!",
+         "published": "2024-01-02T15:30:00Z", "likes": 1200, "shares": "40", "comments": 7, "hashtags": ["earnings"]},
+        {"data_type": "social_media", "platform": "reddit", "content": "", "published": "2024-01-02T15:30:01Z"},
+        {"data_type": "social_media", "content": "quiet day", "published": "2024-01-02T15:30:02Z",
+         "likes": -50, "shares": 0, "comments": 0, "sentiment_score": "-0.4"},
+        {"data_type": "social_media", "content": "viral", "published": "2024-01-02T15:30:03Z",
+         "likes": 10 ** 9, "shares": 10 ** 8, "comments": 10 ** 7},
+    ]
+
+    batch, single = _process_both(posts)
+
+    assert len(batch) == len(single)
+    for got, expected in zip(batch, single):
+        # np.log10 and math.log10 may differ in the last bit
+        assert got["engagement_score"] == pytest.approx(expected["engagement_score"], rel=1e-12)
+        assert _without(got, "processed_at", "engagement_score") == _without(expected, "processed_at", "engagement_score")
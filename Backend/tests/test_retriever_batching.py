@@ -0,0 +1,104 @@
+"""
+TimeAwareRetriever search batching: concurrent searches share search_batch
+calls, and close() never leaves a caller waiting.
+"""
+
+import asyncio
+
+import pytest
+
+from src.rag_engine import retriever as retriever_module
+from src.rag_engine.retriever import TimeAwareRetriever
+
+
+class FakeVectorStore:
+    """Records search_batch calls; each query's result is [{"query": query}].
+    
+    A batch containing the query "slow" waits for `gate` first.
+    """
+    
+    def __init__(self, gate: asyncio.Event = None):
+        self.calls = []
+        self.gate = gate
+    
+    async def search_batch(self, queries, time_range, filters, top_k):
+        self.calls.append((list(queries), time_range, dict(filters)))
+        if self.gate is not None and "slow" in queries:
+            await self.gate.wait()
+        return [[{"query": query}] for query in queries]
+
+
+def test_concurrent_searches_share_a_batch_per_filter():
+    async def run():
+        store = FakeVectorStore()
+        retriever = TimeAwareRetriever(store)
+        results = await asyncio.gather(
+            retriever._search("a", "last_hour", {"data_type": "financial"}),
+            retriever._search("b", "last_hour", {"data_type": "financial"}),
+            retriever._search("c", "last_hour", {"data_type": "news"}),
+        )
+        await retriever.close()
+        return store.calls, results
+    
+    calls, results = asyncio.run(run())
+    
+    assert results == [[{"query": "a"}], [{"query": "b"}], [{"query": "c"}]]
+    assert sorted(calls) == [
+        (["a", "b"], "last_hour", {"data_type": "financial"}),
+        (["c"], "last_hour", {"data_type": "news"}),
+    ]
+
+
+def test_slow_batch_does_not_hold_up_later_searches():
+    async def run():
+        gate = asyncio.Event()
+        retriever = TimeAwareRetriever(FakeVectorStore(gate))
+        slow = asyncio.create_task(retriever._search("slow", "last_hour", {}))
+        await asyncio.sleep(0.2)
+        
+        # The first batch is still waiting on the gate; a new search gets its own call
+        fast = await asyncio.wait_for(retriever._search("fast", "last_hour", {}), 1)
+        
+        gate.set()
+        slow_result = await asyncio.wait_for(slow, 1)
+        await retriever.close()
+        return fast, slow_result
+    
+    fast, slow_result = asyncio.run(run())
+    
+    assert fast == [{"query": "fast"}]
+    assert slow_result == [{"query": "slow"}]
+
+
+def test_close_fails_searches_held_by_the_dispatcher(monkeypatch):
+    # A long batch window keeps the dequeued search in the dispatcher's hands
+    monkeypatch.setattr(retriever_module.settings, "RETRIEVAL_BATCH_WAIT_MS", 60_000)
+    
+    async def run():
+        store = FakeVectorStore()
+        retriever = TimeAwareRetriever(store)
+        pending = asyncio.create_task(retriever._search("a", "last_hour", {}))
+        await asyncio.sleep(0.05)
+        
+        await retriever.close()
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(pending, 1)
+        with pytest.raises(RuntimeError):
+            await retriever._search("b", "last_hour", {})
+        return store.calls
+    
+    assert asyncio.run(run()) == []
+
+
+def test_close_fails_searches_still_queued():
+    async def run():
+        retriever = TimeAwareRetriever(FakeVectorStore())
+        retriever._batch_queue = asyncio.Queue()
+        future = asyncio.get_running_loop().create_future()
+        retriever._batch_queue.put_nowait(("a", "last_hour", {}, future))
+        
+        await retriever.close()
+        with pytest.raises(RuntimeError):
+            await future
+    
+    asyncio.run(run())
@@ -0,0 +1,111 @@
+"""
+DataStreamManager Redis publishing: queued messages are coalesced into one
+pipeline per batch, keep their order, and respect PUBLISH_BATCH.
+"""
+
+import asyncio
+
+import msgpack
+
+from src.data_pipeline.streaming import DataStreamManager
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def publish(self, channel, payload):
+        self.commands.append(("publish", channel, payload))
+
+    def xadd(self, key, fields, **trim):
+        self.commands.append(("xadd", key, fields, trim))
+
+    async def execute(self):
+        self.client.executed.append(self.commands)
+
+
+class FakeRedis:
+    """Records the command list of every executed pipeline"""
+
+    def __init__(self):
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return FakePipeline(self)
+
+
+def _manager(**overrides):
+    manager = DataStreamManager()
+    for name, value in overrides.items():
+        setattr(manager, name, value)
+    manager.redis_client = manager._publish_client = FakeRedis()
+    manager._publish_queue = asyncio.Queue()
+    return manager
+
+
+def _payloads(pipeline):
+    """Decoded messages of a pipeline, from its per-stream publishes"""
+    return [
+        msgpack.unpackb(command[2])
+        for command in pipeline
+        if command[0] == "publish" and command[1] != b"data:updates"
+    ]
+
+
+def test_messages_published_together_share_one_pipeline():
+    async def run():
+        manager = _manager()
+        manager._publish_task = asyncio.create_task(manager._publish_worker())
+        for i in range(3):
+            await manager._publish_to_redis("s1", {"i": i})
+        await asyncio.sleep(0.1)
+        manager._publish_task.cancel()
+        return manager._publish_client.executed
+
+    executed = asyncio.run(run())
+
+    assert len(executed) == 1
+    assert [message["data"] for message in _payloads(executed[0])] == [{"i": 0}, {"i": 1}, {"i": 2}]
+
+    # Each message goes to its stream channel, the updates channel and the stream
+    kinds = [(command[0], command[1]) for command in executed[0][:3]]
+    assert kinds == [("publish", b"stream:s1"), ("publish", b"data:updates"), ("xadd", b"stream:data:s1")]
+    assert executed[0][2][3] == {"maxlen": DataStreamManager.STREAM_MAXLEN, "approximate": True}
+
+
+def test_batches_are_capped_at_publish_batch():
+    async def run():
+        manager = _manager(PUBLISH_BATCH=2)
+        for i in range(5):
+            await manager._publish_to_redis("s1", {"i": i})
+        manager._publish_task = asyncio.create_task(manager._publish_worker())
+        await asyncio.sleep(0.1)
+        manager._publish_task.cancel()
+        return manager._publish_client.executed
+
+    executed = asyncio.run(run())
+
+    assert [len(_payloads(pipeline)) for pipeline in executed] == [2, 2, 1]
+    assert [m["data"]["i"] for pipeline in executed for m in _payloads(pipeline)] == [0, 1, 2, 3, 4]
+
+
+def test_retention_seconds_trims_by_minid():
+    async def run():
+        manager = _manager(STREAM_RETENTION_SECONDS=60)
+        await manager._publish_to_redis("s1", {"i": 0})
+        await manager._flush_publishes([manager._publish_queue.get_nowait()])
+        return manager._publish_client.executed
+
+    (pipeline,) = asyncio.run(run())
+
+    trim = pipeline[2][3]
+    assert trim["approximate"] is True
+    assert trim["minid"].endswith("-0")
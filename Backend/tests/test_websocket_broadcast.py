@@ -0,0 +1,77 @@
+"""
+WebSocket fan-out: ConnectionManager.broadcast sends to every client in
+bounded concurrent chunks and drops clients whose send fails.
+"""
+
+import asyncio
+
+import orjson
+
+from src import main
+from src.main import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, fail: bool = False, delay: float = 0):
+        self.fail = fail
+        self.delay = delay
+        self.sent = []
+
+    async def send_text(self, message: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("client went away")
+        self.sent.append(message)
+
+
+def test_broadcast_reaches_every_client_across_chunks(monkeypatch):
+    monkeypatch.setattr(main, "_BROADCAST_CHUNK", 2)
+    manager = ConnectionManager()
+    clients = [FakeWebSocket() for _ in range(5)]
+    manager.active_connections.extend(clients)
+
+    asyncio.run(manager.broadcast("hello"))
+
+    assert [client.sent for client in clients] == [["hello"]] * 5
+    assert manager.active_connections == clients
+
+
+def test_broadcast_drops_failed_clients_and_keeps_the_rest():
+    manager = ConnectionManager()
+    good, bad, other = FakeWebSocket(), FakeWebSocket(fail=True), FakeWebSocket()
+    manager.active_connections.extend([good, bad, other])
+
+    asyncio.run(manager.broadcast("hello"))
+
+    assert good.sent == other.sent == ["hello"]
+    assert manager.active_connections == [good, other]
+
+
+def test_slow_client_does_not_serialize_the_fan_out():
+    manager = ConnectionManager()
+    manager.active_connections.extend(FakeWebSocket(delay=0.2) for _ in range(10))
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await manager.broadcast("hello")
+        return loop.time() - start
+
+    assert asyncio.run(timed()) < 1.0
+
+
+def test_broadcast_stream_data_sends_one_json_update(monkeypatch):
+    manager = ConnectionManager()
+    client = FakeWebSocket()
+    manager.active_connections.append(client)
+    monkeypatch.setattr(main, "manager", manager)
+
+    asyncio.run(main.broadcast_stream_data("financial_1", {"data_type": "financial_quote", "price": 1.5}))
+
+    assert [orjson.loads(message) for message in client.sent] == [{
+        "type": "data_update",
+        "data_type": "financial_quote",
+        "stream_id": "financial_1",
+        "data": {"data_type": "financial_quote", "price": 1.5}
+    }]
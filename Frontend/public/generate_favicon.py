@@ -1,41 +1,49 @@
 from PIL import Image, ImageDraw
 import base64
+import math
 import os
 
+# Unit vectors for the 8 connecting lines (every 45 degrees), computed once
+_SPOKES = [(math.cos(math.radians(angle)), math.sin(math.radians(angle)))
+           for angle in range(0, 360, 45)]
+
 # Create main icon (32x32)
 icon_sizes = [(16, 16), (32, 32), (48, 48), (64, 64), (128, 128)]
 
+# Draw the symbol once at the largest size; smaller icons are downsampled from it
+master_size = max(icon_sizes)
+master = Image.new('RGBA', master_size, (25, 118, 210, 255))  # #1976d2
+draw = ImageDraw.Draw(master)
+
+# Draw AI/RAG symbol
+width, height = master_size
+padding = width // 5
+
+# Draw brain/network symbol
+center_x, center_y = width // 2, height // 2
+radius = min(center_x, center_y) - padding
+
+# Outer circle (line widths scaled so they stay visible after downsampling)
+scale = width // 32
+draw.ellipse(
+    [center_x - radius, center_y - radius, 
+     center_x + radius, center_y + radius],
+    outline='white', width=2 * scale
+)
+
+# Inner connections
+outer, inner = radius * 0.7, radius * 0.3
+for cos_a, sin_a in _SPOKES:
+    x1 = center_x + outer * cos_a
+    y1 = center_y + outer * sin_a
+    x2 = center_x + inner * cos_a
+    y2 = center_y + inner * sin_a
+    draw.line([(x1, y1), (x2, y2)], fill='white', width=scale)
+
 for size in icon_sizes:
-    img = Image.new('RGBA', size, (25, 118, 210, 255))  # #1976d2
-    draw = ImageDraw.Draw(img)
-    
-    # Draw AI/RAG symbol
-    width, height = size
-    padding = width // 5
-    
-    # Draw brain/network symbol
-    center_x, center_y = width // 2, height // 2
-    radius = min(center_x, center_y) - padding
-    
-    # Outer circle
-    draw.ellipse(
-        [center_x - radius, center_y - radius, 
-         center_x + radius, center_y + radius],
-        outline='white', width=2
-    )
-    
-    # Inner connections
-    if size[0] >= 32:
-        # Draw connecting lines
-        for angle in range(0, 360, 45):
-            rad = angle * 3.14159 / 180
-            x1 = center_x + (radius * 0.7) * math.cos(rad)
-            y1 = center_y + (radius * 0.7) * math.sin(rad)
-            x2 = center_x + (radius * 0.3) * math.cos(rad)
-            y2 = center_y + (radius * 0.3) * math.sin(rad)
-            draw.line([(x1, y1), (x2, y2)], fill='white', width=1)
+    img = master if size == master_size else master.resize(size, Image.LANCZOS)
     
     # Save individual icons
-    img.save(f'favicon_{size[0]}x{size[1]}.png')
+    img.save(f'favicon_{size[0]}x{size[1]}.png', optimize=True, compress_level=9)
 
-print("Icons generated! Use favicon.io to convert to .ico format")
\ No newline at end of file
+print("Icons generated! Use favicon.io to convert to .ico format")